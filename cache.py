@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+import aiofiles
+import aiofiles.os
+import orjson
+
+logger = logging.getLogger("fin-cache")
+
+# 磁盘缓存目录，可通过环境变量修改
+CACHE_DIR = os.environ.get("FIN_CACHE_DIR", ".cache")
+
+# 沧海 API 成功响应的状态码
+SUCCESS_CODE = 200
+
+def is_success(response: Any) -> bool:
+    """判断是否为可以缓存的成功响应：data 不为空，且状态码（如有）表示成功"""
+    return (
+        isinstance(response, dict)
+        and response.get("data") is not None
+        and response.get("code", SUCCESS_CODE) == SUCCESS_CODE
+    )
+
+class FileCache:
+    """沧海 API 响应的磁盘缓存，进程重启后依然有效
+
+    每个条目保存为 {root}/{接口路径}/{参数的md5}.json，内容为 {"ts": 写入时间, "ttl": 有效秒数, "data": 响应}。
+    只缓存 is_success 判定为成功的响应。
+    """
+
+    def __init__(self, root: str = CACHE_DIR):
+        self.root = root
+
+    def _path(self, endpoint: str, params: List[tuple]) -> str:
+        """根据接口路径和参数计算缓存文件路径"""
+        slug = endpoint.strip("/").replace("/", "_")
+        digest = hashlib.md5(orjson.dumps(sorted(params))).hexdigest()
+        return os.path.join(self.root, slug, f"{digest}.json")
+
+    async def get(self, endpoint: str, params: List[tuple]) -> Optional[Any]:
+        """读取未过期的缓存条目，不存在、已过期或文件损坏时返回 None"""
+        try:
+            async with aiofiles.open(self._path(endpoint, params), "rb") as f:
+                entry = orjson.loads(await f.read())
+            if entry["ts"] + entry["ttl"] < time.time():
+                return None
+            return entry["data"]
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError, KeyError, TypeError) as e:
+            logger.warning("读取磁盘缓存失败: %s", e)
+            return None
+
+    async def set(self, endpoint: str, params: List[tuple], ttl: float, data: Any) -> None:
+        """写入缓存条目；先写临时文件再替换，避免并发读取到写了一半的文件"""
+        path = self._path(endpoint, params)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            await aiofiles.os.makedirs(os.path.dirname(path), exist_ok=True)
+            async with aiofiles.open(tmp_path, "wb") as f:
+                await f.write(orjson.dumps({"ts": time.time(), "ttl": ttl, "data": data}))
+            await aiofiles.os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("写入磁盘缓存失败: %s", e)
+
+    async def get_or_fetch(self, endpoint: str, params: List[tuple], ttl: float,
+                           fetch_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """命中缓存时直接返回，否则调用 fetch_fn 获取响应，成功的响应写入缓存"""
+        data = await self.get(endpoint, params)
+        if data is not None:
+            return data
+        data = await fetch_fn()
+        if is_success(data):
+            await self.set(endpoint, params, ttl, data)
+        return data
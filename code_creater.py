@@ -1,15 +1,58 @@
 import os
-import json
+import ast
 import re
-from openai import OpenAI
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import PurePath
+import httpx
+import orjson
+from openai import AsyncOpenAI
 
 # 配置API密钥和客户端
 API_KEY = os.getenv("DASHSCOPE_API_KEY", "your_api_key")  # 请替换为您的实际API密钥
-client = OpenAI(
+# 启用HTTP/2并扩大连接池，使并发请求复用同一TLS连接
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=64)
+)
+client = AsyncOpenAI(
     api_key=API_KEY,
-    base_url="https://dashscope.aliyuncs.com/compatible-mode/v1"
+    base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
+    http_client=http_client
 )
 
+# 同时进行的LLM请求数量上限
+MAX_CONCURRENT_REQUESTS = 20
+# 用于执行阻塞文件读写的线程数
+MAX_IO_WORKERS = 16
+
+# 每次LLM请求中包含的JSON文件数量，server.py和tools.py的内容只需随每批发送一次
+BATCH_SIZE = 5
+# 每个函数预留的输出token数，批量请求的max_tokens按批次中的文件数放大
+MAX_TOKENS_PER_FUNCTION = 4000
+# 模型单次输出的token上限，放大后的max_tokens不超过该值
+MAX_OUTPUT_TOKENS = 8192
+# 批量输出中分隔各文件代码的标记行
+FILE_MARKER = "### FILE:"
+
+# 提示开头的固定说明
+PROMPT_INSTRUCTIONS = f"""观察server.py和tools.py以及传入的json，模仿代码风格为每个JSON各写一个新的tool function，返回的内容只能是字典，不要列表，只需要输出这些函数即可，其余的都不用输出，函数命名和注释必须完整。
+请直接输出Python代码，不要包含任何Markdown格式或代码块标记（如```python或```），除了代码外其余的什么都不要出现！
+每个函数之前必须单独一行输出“{FILE_MARKER} <对应的JSON文件名>”作为分隔。
+
+"""
+
+# LLM响应缓存目录，以提示的sha256为键
+LLM_CACHE_DIR = ".llm_cache"
+
+# 预编译的正则表达式
+# 开头的```python、结尾的```以及其他位置的代码块标记，一次扫描全部移除
+_RE_FENCES = re.compile(r'^```\w*\n|\n```$|```\w*')
+_RE_FUNC_DEF = re.compile(r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\(')
+_RE_FILE_MARKER = re.compile(r'^' + re.escape(FILE_MARKER) + r'\s*(\S+)\s*$', re.MULTILINE)
+
 def read_file_content(file_path):
     """读取文件内容"""
     try:
@@ -19,65 +62,101 @@ def read_file_content(file_path):
         print(f"读取文件 {file_path} 时出错: {e}")
         return None
 
+def compact_json_for_prompt(file_path):
+    """读取JSON文件并去除多余空白，减少提示中的token数量"""
+    try:
+        with open(file_path, 'rb') as file:
+            obj = orjson.loads(file.read())
+        # orjson 默认输出紧凑的UTF-8，无需额外的分隔符和ensure_ascii设置
+        return orjson.dumps(obj).decode('utf-8')
+    except orjson.JSONDecodeError:
+        # 非标准JSON时退回原始文本
+        return read_file_content(file_path)
+    except Exception as e:
+        print(f"读取文件 {file_path} 时出错: {e}")
+        return None
+
 def get_json_files(directory):
     """获取指定目录下的所有JSON文件"""
-    json_files = []
     try:
-        for file in os.listdir(directory):
-            if file.endswith('.json'):
-                json_files.append(os.path.join(directory, file))
+        # DirEntry 自带文件类型信息，无需额外的 stat 调用
+        with os.scandir(directory) as entries:
+            return [entry.path for entry in entries if entry.is_file() and entry.name.endswith('.json')]
     except Exception as e:
         print(f"读取目录 {directory} 时出错: {e}")
-    return json_files
+        return []
 
-def call_llm_api(prompt):
-    """调用LLM API生成代码"""
+async def call_llm_api(prompt, max_tokens=MAX_TOKENS_PER_FUNCTION):
+    """调用LLM API生成代码，相同提示的结果直接从磁盘缓存读取
+    
+    返回 (生成内容, 是否因达到max_tokens被截断)，被截断的内容不写入缓存
+    """
+    cache_key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    cache_path = os.path.join(LLM_CACHE_DIR, cache_key + ".txt")
+    if os.path.exists(cache_path):
+        cached = read_file_content(cache_path)
+        if cached:
+            return cached, False
+    
     try:
-        completion = client.chat.completions.create(
+        completion = await client.chat.completions.create(
             model="qwen-max-latest",  # 使用通义千问最新模型
             messages=[
                 {"role": "system", "content": "你是一个专业的Python开发者，擅长编写工具函数。请直接输出Python函数代码，不要包含任何Markdown格式或代码块标记（如```python或```）。"},
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=4000
+            max_tokens=max_tokens,
+            stream=True
         )
-        return completion.choices[0].message.content
+        # 流式接收生成内容，等待期间事件循环可以处理其他批次
+        parts = []
+        finish_reason = None
+        async for chunk in completion:
+            if chunk.choices:
+                if chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                if chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+        content = "".join(parts)
     except Exception as e:
         print(f"调用API时出错: {e}")
-        return None
+        return None, False
+    
+    truncated = finish_reason == "length"
+    if truncated:
+        print(f"模型输出达到max_tokens={max_tokens}被截断，结果不写入缓存")
+    elif content:
+        # 先写临时文件再替换，避免中断时留下不完整的缓存
+        try:
+            os.makedirs(LLM_CACHE_DIR, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print(f"写入LLM缓存 {cache_path} 时出错: {e}")
+    return content, truncated
 
 def clean_code_output(code_text):
     """清理代码输出，移除可能的Markdown代码块标记"""
-    # 移除开头的```python或```及类似标记
-    code_text = re.sub(r'^```\w*\n', '', code_text)
-    # 移除结尾的```
-    code_text = re.sub(r'\n```$', '', code_text)
-    # 移除其他可能的代码块标记
-    code_text = re.sub(r'```\w*', '', code_text)
-    return code_text.strip()
+    return _RE_FENCES.sub('', code_text).strip()
 
 def extract_functions(generated_code):
-    """从生成的代码中提取函数"""
-    # 使用正则表达式匹配函数定义
-    function_pattern = r'def\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*\('
-    functions = re.findall(function_pattern, generated_code)
-    return functions
+    """从生成的代码中提取顶层函数名"""
+    try:
+        tree = ast.parse(generated_code)
+    except SyntaxError:
+        # 代码无法解析时退回正则表达式匹配函数定义
+        return _RE_FUNC_DEF.findall(generated_code)
+    return [node.name for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))]
 
 def ensure_directory_exists(directory):
     """确保目录存在，如果不存在则创建"""
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-        print(f"创建目录: {directory}")
+    os.makedirs(directory, exist_ok=True)
 
-def save_functions_to_file(generated_code, output_dir, output_file):
-    """将生成的函数保存到文件"""
+def save_functions_to_file(clean_code, output_dir, output_file):
+    """将已清理的函数代码保存到文件（输出目录需由调用方预先创建）"""
     try:
-        # 确保目录存在
-        ensure_directory_exists(output_dir)
-        
-        # 清理代码输出
-        clean_code = clean_code_output(generated_code)
-        
         # 构建完整的文件路径
         full_path = os.path.join(output_dir, output_file)
         
@@ -89,6 +168,35 @@ def save_functions_to_file(generated_code, output_dir, output_file):
         print(f"保存函数到文件时出错: {e}")
         return False
 
+def is_output_fresh(output_path, source_paths):
+    """判断输出文件是否存在且不早于所有输入文件"""
+    try:
+        output_mtime = os.path.getmtime(output_path)
+        return all(os.path.getmtime(path) <= output_mtime for path in source_paths)
+    except OSError:
+        return False
+
+def chunked(items, size):
+    """将列表按指定大小切分为多个批次"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def split_batch_output(generated_code, file_names):
+    """按文件标记拆分批量生成的代码，返回 {文件名: 代码} 字典"""
+    matches = list(_RE_FILE_MARKER.finditer(generated_code))
+    if not matches:
+        # 单文件批次时模型可能省略标记，整个输出即为该文件的代码
+        return {file_names[0]: generated_code} if len(file_names) == 1 else {}
+    
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(generated_code)
+        name = match.group(1)
+        if name in file_names:
+            sections[name] = generated_code[match.end():end]
+    return sections
+
 def generate_import_statement(functions):
     """生成导入语句和工具注册代码"""
     if not functions:
@@ -99,7 +207,8 @@ def generate_import_statement(functions):
     
     return import_statement + tool_registrations
 
-def main():
+async def generate_all():
+    """为 tsanghi_docs 下的所有JSON文件生成工具函数"""
     # 定义输出目录
     output_dir = "tools_code"
     
@@ -118,63 +227,127 @@ def main():
         print("未找到JSON文件")
         return
     
-    # 为每个JSON文件生成函数
-    all_functions = []
+    # 每个JSON文件对应的输出文件名只计算一次
+    output_files = {json_file: f"generated_function_{PurePath(json_file).stem}.py" for json_file in json_files}
     
-    for json_file in json_files:
-        print(f"处理文件: {json_file}")
+    # 输出目录只需在开始时创建一次
+    ensure_directory_exists(output_dir)
+    
+    # 提示中server.py和tools.py部分对所有JSON文件都相同，只拼接一次
+    prompt_head = PROMPT_INSTRUCTIONS + "server.py的内容为：\n" + server_content + "\n\ntools.py的内容为：\n" + tools_content + "\n\n"
+    
+    # 限制并发请求数量，避免超出API的QPM限制
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    # 文件读写放到线程池中执行，避免阻塞事件循环
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=MAX_IO_WORKERS))
+    
+    async def process_batch(batch):
+        """为一批JSON文件生成函数，返回 {JSON文件: (函数名列表, 代码)} 字典"""
+        print(f"处理文件: {', '.join(batch)}")
         
         # 读取JSON内容
-        json_content = read_file_content(json_file)
-        if not json_content:
-            continue
+        json_contents = {}
+        batch_contents = await asyncio.gather(*(loop.run_in_executor(None, compact_json_for_prompt, json_file) for json_file in batch))
+        for json_file, json_content in zip(batch, batch_contents):
+            if json_content:
+                json_contents[os.path.basename(json_file)] = (json_file, json_content)
+        if not json_contents:
+            return {}
         
-        # 构建提示
-        prompt = f"""观察server.py和tools.py以及传入的json，模仿代码风格写一个新的tool function，返回的内容只能是字典，不要列表，只需要输出该函数即可，其余的都不用输出，函数命名和注释必须完整。
-请直接输出Python代码，不要包含任何Markdown格式或代码块标记（如```python或```），除了代码外其余的什么都不要出现！
-
-server.py的内容为：
-{server_content}
-
-tools.py的内容为：
-{tools_content}
-
-JSON内容为：
-{json_content}
-"""
+        # 构建提示（只有JSON内容随批次变化）
+        prompt_parts = [prompt_head, f"下面是{len(json_contents)}个JSON，请为每个生成一个函数，按 {FILE_MARKER} <name> 分隔输出：\n"]
+        for name, (_, json_content) in json_contents.items():
+            prompt_parts.append(f"{FILE_MARKER} {name}\n{json_content}\n")
+        prompt = "".join(prompt_parts)
         
-        # 调用LLM API
-        generated_code = call_llm_api(prompt)
+        # 调用LLM API，输出token上限随批次中的文件数放大
+        max_tokens = min(MAX_TOKENS_PER_FUNCTION * len(json_contents), MAX_OUTPUT_TOKENS)
+        async with semaphore:
+            generated_code, truncated = await call_llm_api(prompt, max_tokens)
         if not generated_code:
-            continue
+            return {}
         
-        # 提取函数名
-        clean_code = clean_code_output(generated_code)
-        file_functions = extract_functions(clean_code)
-        all_functions.extend(file_functions)
+        batch_functions = {}
+        sections = split_batch_output(generated_code, list(json_contents))
+        if truncated and sections:
+            # 输出被截断时最后一段代码不完整，丢弃后与缺失的文件一起单独重试
+            sections.pop(list(sections)[-1])
+        for name, section in sections.items():
+            json_file = json_contents[name][0]
+            
+            # 清理代码输出（只清理一次，提取函数名和保存文件共用）
+            clean_code = clean_code_output(section)
+            file_functions = extract_functions(clean_code)
+            
+            # 保存到文件
+            output_file = output_files[json_file]
+            await loop.run_in_executor(None, save_functions_to_file, clean_code, output_dir, output_file)
+            batch_functions[json_file] = (file_functions, clean_code)
         
-        # 保存到文件
-        output_file = f"generated_function_{os.path.basename(json_file).replace('.json', '.py')}"
-        save_functions_to_file(generated_code, output_dir, output_file)
+        missing = set(json_contents) - set(sections)
+        if missing:
+            if len(json_contents) > 1:
+                print(f"以下文件的代码缺失或被截断，逐个重新生成: {', '.join(sorted(missing))}")
+                retries = await asyncio.gather(*(process_batch([json_contents[name][0]]) for name in sorted(missing)))
+                for retry in retries:
+                    batch_functions.update(retry)
+            else:
+                print(f"模型输出中缺少以下文件的完整代码: {', '.join(sorted(missing))}")
+        return batch_functions
+    
+    # 输出文件比JSON、server.py和tools.py都新时直接复用，不再调用LLM
+    generated_by_file = {}
+    pending_files = []
+    for json_file in json_files:
+        full_path = os.path.join(output_dir, output_files[json_file])
+        if is_output_fresh(full_path, (json_file, 'server.py', 'tools.py')):
+            existing_code = read_file_content(full_path)
+            if existing_code:
+                print(f"跳过未变化的文件: {json_file}")
+                generated_by_file[json_file] = (extract_functions(existing_code), existing_code)
+                continue
+        pending_files.append(json_file)
+    
+    # 按批次并发生成函数
+    batches = list(chunked(pending_files, BATCH_SIZE))
+    results = await asyncio.gather(*(process_batch(batch) for batch in batches), return_exceptions=True)
+    
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            print(f"处理文件 {', '.join(batch)} 时出错: {result}")
+            continue
+        generated_by_file.update(result)
+    
+    all_functions = []
+    for json_file in json_files:
+        if json_file in generated_by_file:
+            all_functions.extend(generated_by_file[json_file][0])
     
     # 生成导入语句和工具注册代码
     import_statement = generate_import_statement(all_functions)
     print("\n生成的导入语句和工具注册代码:")
     print(import_statement)
     
-    # 将所有生成的函数合并到一个文件（保存在当前目录）
+    # 将所有生成的函数合并到一个文件（保存在当前目录），直接写入内存中的代码，不再回读各个输出文件
     combined_file = "all_generated_functions.py"
-    with open(combined_file, 'w', encoding='utf-8') as file:
+    with open(combined_file, 'w', encoding='utf-8', buffering=1 << 20) as file:
         for json_file in json_files:
-            output_file = f"generated_function_{os.path.basename(json_file).replace('.json', '.py')}"
-            full_path = os.path.join(output_dir, output_file)
-            if os.path.exists(full_path):
-                content = read_file_content(full_path)
-                if content:
-                    file.write(content + "\n\n")
+            _, code = generated_by_file.get(json_file, (None, ""))
+            if code:
+                file.write(code)
+                file.write("\n\n")
     
     print(f"\n所有生成的函数已合并到 {combined_file}")
     print("请将此文件的内容复制到tools.py中，并使用上面生成的导入语句和工具注册代码")
 
+async def main():
+    """执行生成流程，结束（包括出错）后关闭共享的 HTTP 客户端"""
+    try:
+        await generate_all()
+    finally:
+        await http_client.aclose()
+
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -3,15 +3,40 @@ import json
 import os
 import logging
 import time
-import random
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
 from typing import List, Dict
+import aiofiles
+from aiolimiter import AsyncLimiter
 from crawl4ai import AsyncWebCrawler, CrawlerRunConfig, BrowserConfig, CacheMode
 from crawl4ai.extraction_strategy import JsonCssExtractionStrategy
-from bs4 import BeautifulSoup
-import re
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 import html
 
+# 优先使用C实现的lxml解析器，未安装时退回标准库的html.parser
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HTML_PARSER = 'lxml'
+except ImportError:
+    etree = lxml_html = None
+    HTML_PARSER = 'html.parser'
+
+# 标题提取只查询正文中的div/p/h*/table等元素，解析时跳过head、script、style等无关节点
+CONTENT_STRAINER = SoupStrainer(['div', 'p', 'h1', 'h2', 'h3', 'table'])
+
+# 预编译的正则表达式
+_DIV_ID_RE = re.compile(r'div(\d+-\d+-\d+)_\d+')
+_NAV_SPLIT_RE = re.compile(r'\s*>\s*')
+_ROW_RE = re.compile(r'<tr class="el-table__row[^>]*>(.*?)</tr>', re.DOTALL)
+_CELL_RE = re.compile(r'<div class="cell">(.*?)</div>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_IMPORT_RE = re.compile(r'import(\w+)')
+_URL_ASSIGN_RE = re.compile(r'url=f"')
+_DATA_ASSIGN_RE = re.compile(r'data=requests')
+
 
 # 配置日志
 logging.basicConfig(
@@ -26,18 +51,35 @@ logger = logging.getLogger(__name__)
 
 # 定义要爬取的索引范围
 def generate_indices():
-    indices = []
-    for i in range(2, 6):  # 2到5
-        for j in range(1, 6):  # 1到5
-            for k in range(1, 6):  # 1到5
-                indices.append(f"{i}-{j}-{k}")
-    return indices
-
-async def crawl_doc_page(crawler, index: str, output_dir: str):
-    # 添加随机延迟，模拟人类行为
-    delay = 1 + random.random() * 2  # 1-3秒的随机延迟
-    await asyncio.sleep(delay)
-    
+    # i取2到5，j和k取1到5
+    return [f"{i}-{j}-{k}" for i, j, k in product(range(2, 6), range(1, 6), range(1, 6))]
+
+# 默认同时爬取的页面数量
+DEFAULT_CONCURRENCY = 16
+
+# 所有并发任务共享的每秒请求数上限
+DEFAULT_RATE = 4
+
+# 是否以缩进格式保存结果文件，由 --debug 参数开启
+PRETTY_JSON = False
+
+# 浏览器请求头
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "Referer": "https://tsanghi.com/",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8"
+}
+
+# 每个页面加载后注入的脚本：模拟用户代理
+_PAGE_JS = """
+Object.defineProperty(navigator, 'userAgent', {
+    value: 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    writable: false
+});
+"""
+
+async def crawl_doc_page(crawler, index: str, output_dir: str, executor=None):
     logger.info(f"正在爬取索引 {index}...")
     
     # 改进提取结构，使用更多的选择器组合
@@ -49,7 +91,7 @@ async def crawl_doc_page(crawler, index: str, output_dir: str):
             {"name": "title", "selector": "h1, .doc-title, .api-title, .page-title, header h1, .main-title", "type": "text"},
             
             # 新增：提取原始三级标题
-            {"name": "raw_title", "selector": ".containerFlex .flex-item p, div.containerFlex h3, h3.api-section-title, .main-content h3", "type": "text"},
+            {"name": "raw_title", "selector": ".containerFlex .flex-item p, div.containerFlex h3, h3.api-section-title, .api-title, .page-title h3, .main-content h3", "type": "text"},
             
             # 新增：提取一二级标题
             {"name": "level1_2_title", "selector": f"#div{index}_1 > p, .div{index}_1 > p", "type": "text"},
@@ -63,157 +105,22 @@ async def crawl_doc_page(crawler, index: str, output_dir: str):
             {"name": "request", "selector": "#pane-request0, .request-section, .request, #request-details", "type": "html"},
             {"name": "response", "selector": "#pane-response0, .response-section, .response, #response-details", "type": "html"},
             {"name": "python_example", "selector": "pre.python-code, pre, code.python, .code-example, .example-code", "type": "text"},
-            # 备份整个页面内容
-            {"name": "page_content", "selector": "body", "type": "html"},
             # 添加表格提取
             {"name": "all_tables", "selector": ".el-table, table", "type": "html_list"}
         ]
     }
-    js_code = """
-    // 模拟用户代理
-    Object.defineProperty(navigator, 'userAgent', {
-        value: 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        writable: false
-    });
-    
-    // 模拟语言设置
-    Object.defineProperty(navigator, 'language', {
-        value: 'zh-CN',
-        writable: false
-    });
-    
-    // 快速检查页面是否为空（在5秒内完成）
-    function checkIfPageEmpty() {
-        // 检查页面是否有任何有意义的内容
-        const hasContent = document.querySelector('.containerFlex, .el-table, table, .api-section, .doc-title, h1');
-        if (!hasContent) {
-            // 如果没有找到任何内容，标记页面为空
-            document.body.setAttribute('data-page-empty', 'true');
-            console.log('页面似乎为空，已标记');
-            return true;
-        }
-        return false;
-    }
-    
-    // 等待元素的改进版本，增加超时功能
-    function waitForElement(selector, timeout) {
-        return new Promise((resolve, reject) => {
-            // 先检查页面是否为空
-            if (checkIfPageEmpty()) {
-                reject(new Error('页面为空'));
-                return;
-            }
-            
-            const startTime = Date.now();
-            const checkElement = () => {
-                const element = document.querySelector(selector);
-                if (element) {
-                    resolve(element);
-                    return;
-                }
-                
-                // 每5秒再次检查页面是否为空
-                if (Date.now() - startTime > 5000 && checkIfPageEmpty()) {
-                    reject(new Error('页面为空'));
-                    return;
-                }
-                
-                if (Date.now() - startTime > timeout) {
-                    reject(new Error(`等待元素 ${selector} 超时`));
-                    return;
-                }
-                
-                setTimeout(checkElement, 100);
-            };
-            
-            checkElement();
-        });
-    }
-    
-    // 主函数
-    async function main() {
-        try {
-            // 快速检查页面是否为空
-            if (checkIfPageEmpty()) {
-                return;
-            }
-            
-            // 给页面5秒钟加载基本内容
-            await new Promise(resolve => setTimeout(resolve, 5000));
-            
-            // 再次检查是否为空
-            if (checkIfPageEmpty()) {
-                return;
-            }
-            
-            // 如果页面不为空，继续正常流程
-            try {
-                // 等待请求选项卡出现
-                const requestTab = await waitForElement('#tab-request0', 5000);
-                console.log('找到请求选项卡');
-                
-                // 点击请求选项卡
-                requestTab.click();
-                console.log('已点击请求选项卡');
-                
-                // 等待请求内容加载
-                await new Promise(resolve => setTimeout(resolve, 1000));
-                
-                // 等待响应选项卡出现
-                const responseTab = await waitForElement('#tab-response0', 5000);
-                console.log('找到响应选项卡');
-                
-                // 点击响应选项卡
-                responseTab.click();
-                console.log('已点击响应选项卡');
-                
-                // 等待响应内容加载
-                await new Promise(resolve => setTimeout(resolve, 1000));
-                
-                // 标记完成
-                document.body.setAttribute('data-tabs-clicked', 'true');
-            } catch (error) {
-                // 如果过程中出错，但页面不是空的，标记为内容已处理
-                if (!document.body.hasAttribute('data-page-empty')) {
-                    document.body.setAttribute('data-content-processed', 'true');
-                }
-                console.error('交互过程中出错:', error);
-            }
-        } catch (error) {
-            console.error('主函数执行出错:', error);
-        }
-    }
-    
-    // 执行主函数
-    setTimeout(main, 1000);
-    """
     config = CrawlerRunConfig(
         cache_mode=CacheMode.BYPASS,
         extraction_strategy=JsonCssExtractionStrategy(schema),
-        wait_for="[data-tabs-clicked='true'], [data-page-empty='true'], [data-content-processed='true'], .el-table, table",
+        wait_for=".el-table, table",
         page_timeout=30000,
         screenshot=False,
-        js_code=js_code
+        js_code=_PAGE_JS
     )
     
     try:
         url = f"https://tsanghi.com/fin/doc?index={index}"
-        browser_headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-            "Referer": "https://tsanghi.com/",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8"
-        }
-        js_set_headers = """
-        Object.defineProperty(navigator, 'userAgent', {
-            value: 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            writable: false
-        });
-        """
-        config.js_code = js_set_headers
-        
         result = await crawler.arun(url=url, config=config)
-        await asyncio.sleep(3)
         
         if result.success:
             if result.extracted_content is None or str(result.extracted_content).strip() == "" or str(result.extracted_content).strip() == "[]":
@@ -227,7 +134,9 @@ async def crawl_doc_page(crawler, index: str, output_dir: str):
                 if not json_content or (isinstance(json_content, list) and (len(json_content) == 0 or not any(item for item in json_content))):
                     logger.info(f"索引 {index} 的JSON内容为空")
                     return {"is_empty_page": True}
-                processed_content = post_process_content(json_content)
+                # HTML解析是CPU密集型工作，放到进程池中执行，不阻塞其他页面的爬取
+                loop = asyncio.get_running_loop()
+                processed_content = await loop.run_in_executor(executor, post_process_content, json_content)
                 
                 # 再次检查处理后的内容是否为空
                 if not processed_content or (isinstance(processed_content, list) and len(processed_content) == 0):
@@ -236,8 +145,9 @@ async def crawl_doc_page(crawler, index: str, output_dir: str):
                 
                 # 保存到doc_文件（不再生成processed文件）
                 output_file = os.path.join(output_dir, f"doc_{index}.json")
-                with open(output_file, "w", encoding="utf-8") as f:
-                    json.dump(processed_content, f, ensure_ascii=False, indent=2)
+                # 默认紧凑写入，--debug 时才缩进便于人工查看；异步写文件，不阻塞其他页面的爬取
+                async with aiofiles.open(output_file, "w", encoding="utf-8") as f:
+                    await f.write(json.dumps(processed_content, ensure_ascii=False, indent=2 if PRETTY_JSON else None))
                 
                 logger.info(f"成功爬取并保存索引 {index}")
                 
@@ -259,73 +169,87 @@ async def crawl_doc_page(crawler, index: str, output_dir: str):
 def clean_text(text):
     """简单的文本清理函数：去除多余的空白符"""
     if text:
-        import html
-        text = html.unescape(text)
-        return " ".join(text.split())
+        return _WS_RE.sub(' ', html.unescape(text)).strip()
     return ""
 
+def find_by_child_path(tag, path):
+    """沿直接子元素路径查找第一个匹配的元素，等价于 'a > b > c' 形式的CSS选择器
+    
+    path 为 (标签名, class) 元组列表，class 为 None 时不限制class
+    """
+    name, class_ = path[0]
+    for child in tag.find_all(name, class_=class_, recursive=False):
+        if len(path) == 1:
+            return child
+        found = find_by_child_path(child, path[1:])
+        if found is not None:
+            return found
+    return None
+
 def extract_page_hierarchy(page_content):
     """直接从HTML中提取三级层级结构"""
     if not page_content:
         return ""
         
-    soup = BeautifulSoup(page_content, 'html.parser')
+    soup = BeautifulSoup(page_content, HTML_PARSER, parse_only=CONTENT_STRAINER)
     hierarchy = []
     
-    print("开始提取文档层级结构...")
-    all_div_patterns = [
-        r'div(\d+-\d+-\d+)_\d+',
-        r'id="div(\d+-\d+-\d+)_\d+"',
-        r'id=\'div(\d+-\d+-\d+)_\d+\''
-    ]
-    
-    div_id = ""
-    for pattern in all_div_patterns:
-        div_ids = re.findall(pattern, page_content)
-        if div_ids:
-            div_id = div_ids[0]
-            print(f"找到div ID: {div_id}")
-            break
+    logger.debug("开始提取文档层级结构...")
+    # 带引号的id属性写法也会被这个模式匹配到，一次扫描即可
+    m = _DIV_ID_RE.search(page_content)
+    div_id = m.group(1) if m else ""
+    if div_id:
+        logger.debug("找到div ID: %s", div_id)
     
     if div_id:
         try:
-            for selector in [f'#div{div_id}_1 > p', f'.div{div_id}_1 > p', f'[id^="div{div_id}"] > p']:
-                level1_2_element = soup.select_one(selector)
-                if level1_2_element:
-                    level1_2_text = clean_text(level1_2_element.get_text())
-                    print(f"从选择器 '{selector}' 找到第一二级: {level1_2_text}")
-                    if level1_2_text:
-                        if '>' in level1_2_text:
-                            level_parts = level1_2_text.split('>')
-                            for i, part in enumerate(level_parts):
-                                clean_part = clean_text(part)
-                                if clean_part:
-                                    hierarchy.append(clean_part)
-                                    print(f"添加层级{i+1}: {clean_part}")
-                        else:
-                            hierarchy.append(level1_2_text)
-                            print(f"添加单一层级: {level1_2_text}")
-                    break
+            # id选择器直接用find定位，避免每次调用CSS选择器引擎
+            div_container = soup.find(id=f'div{div_id}_1')
+            
+            selector = f'#div{div_id}_1 > p'
+            level1_2_element = find_by_child_path(div_container, [('p', None)]) if div_container else None
+            if level1_2_element is None:
+                for selector in [f'.div{div_id}_1 > p', f'[id^="div{div_id}"] > p']:
+                    level1_2_element = soup.select_one(selector)
+                    if level1_2_element:
+                        break
+            if level1_2_element:
+                level1_2_text = clean_text(level1_2_element.get_text())
+                logger.debug("从选择器 '%s' 找到第一二级: %s", selector, level1_2_text)
+                if level1_2_text:
+                    if '>' in level1_2_text:
+                        level_parts = level1_2_text.split('>')
+                        for i, part in enumerate(level_parts):
+                            clean_part = clean_text(part)
+                            if clean_part:
+                                hierarchy.append(clean_part)
+                                logger.debug("添加层级%s: %s", i+1, clean_part)
+                    else:
+                        hierarchy.append(level1_2_text)
+                        logger.debug("添加单一层级: %s", level1_2_text)
             
             # 第三级name选择器(通用格式)
-            for selector in [
-                f'#div{div_id}_1 > div.containerFlex > div.flex-item > p',
-                f'.div{div_id}_1 > div.containerFlex > div.flex-item > p',
-                f'[id^="div{div_id}"] > div.containerFlex > div.flex-item > p'
-            ]:
-                level3_element = soup.select_one(selector)
-                if level3_element:
-                    level3_text = clean_text(level3_element.get_text())
-                    print(f"从选择器 '{selector}' 找到第三级: {level3_text}")
-                    if level3_text:
-                        hierarchy.append(level3_text)
-                    break
+            selector = f'#div{div_id}_1 > div.containerFlex > div.flex-item > p'
+            level3_element = find_by_child_path(div_container, [('div', 'containerFlex'), ('div', 'flex-item'), ('p', None)]) if div_container else None
+            if level3_element is None:
+                for selector in [
+                    f'.div{div_id}_1 > div.containerFlex > div.flex-item > p',
+                    f'[id^="div{div_id}"] > div.containerFlex > div.flex-item > p'
+                ]:
+                    level3_element = soup.select_one(selector)
+                    if level3_element:
+                        break
+            if level3_element:
+                level3_text = clean_text(level3_element.get_text())
+                logger.debug("从选择器 '%s' 找到第三级: %s", selector, level3_text)
+                if level3_text:
+                    hierarchy.append(level3_text)
         except Exception as e:
-            print(f"使用特定选择器提取层级时出错: {str(e)}")
+            logger.warning("使用特定选择器提取层级时出错: %s", e)
     
     # 如果使用特定选择器未能提取全部层级，尝试备用方法
     if len(hierarchy) < 1:
-        print("特定选择器未能提取层级，尝试备用方法...")
+        logger.debug("特定选择器未能提取层级，尝试备用方法...")
         
         # 尝试查找所有具有特定样式的段落(通常用于导航路径)
         all_p = soup.find_all('p')
@@ -336,52 +260,59 @@ def extract_page_hierarchy(page_content):
             
             # 打印调试信息
             if style or '>' in text:
-                print(f"找到潜在导航段落: '{text}' (样式: {style})")
+                logger.debug("找到潜在导航段落: '%s' (样式: %s)", text, style)
             
             if ('color' in style.lower() and any(color in style.lower() for color in ['#7f7f7f', 'rgb(127', 'gray', 'grey'])) or '>' in text:
                 if '>' in text:
-                    parts = re.split(r'\s*>\s*', html.unescape(text))
+                    parts = _NAV_SPLIT_RE.split(html.unescape(text))
                     for part in parts:
                         clean_part = clean_text(part)
                         if clean_part and clean_part not in hierarchy:
                             hierarchy.append(clean_part)
-                            print(f"从导航文本添加层级: {clean_part}")
+                            logger.debug("从导航文本添加层级: %s", clean_part)
                 else:
                     clean_text_p = clean_text(text)
                     if clean_text_p and clean_text_p not in hierarchy:
                         hierarchy.append(clean_text_p)
-                        print(f"从样式段落添加层级: {clean_text_p}")
+                        logger.debug("从样式段落添加层级: %s", clean_text_p)
     
     # 组合层级
     if hierarchy:
         result = "-".join(hierarchy)
-        print(f"最终提取的层级: {result}")
+        logger.debug("最终提取的层级: %s", result)
         return result
     else:
-        print("警告：未能提取到任何层级信息")
+        logger.warning("未能提取到任何层级信息")
         return ""
 
+# 少于该长度的HTML不可能包含完整的文档内容
+MIN_DOC_HTML_LENGTH = 512
+
+def has_doc_content(raw_html):
+    """用子串快速判断HTML中是否可能包含文档内容，避免对空页面做完整解析"""
+    if len(raw_html) < MIN_DOC_HTML_LENGTH:
+        return False
+    return 'el-table' in raw_html
+
 def post_process_content(json_content):
-    """使用BeautifulSoup直接从HTML中提取所需信息"""
+    """从已提取的字段和HTML中整理出标题、请求/响应参数和示例代码"""
     if not isinstance(json_content, list) or len(json_content) == 0:
         return json_content
     
     content = json_content[0]
     
-    # 获取原始HTML内容 - 直接使用page_content作为主要来源
-    raw_html = ""
-    
-    # 确保我们使用page_content作为主要HTML源
-    if "page_content" in content and content["page_content"]:
-        raw_html = content["page_content"]
-    if not raw_html:
-        # 尝试从其他字段获取HTML内容作为备用
-        for field in ["request", "response", "all_tables", "request_params_table", "response_params_table"]:
-            if field in content and content[field]:
-                raw_html += content[field]
+    # 获取原始HTML内容 - 由已提取的请求/响应区块和表格拼接，不再抓取整个body
+    all_tables = content.get("all_tables") or []
+    if isinstance(all_tables, str):
+        all_tables = [all_tables]
+    raw_html = (content.get("request") or "") + (content.get("response") or "") + "".join(all_tables)
     
-    # 创建BeautifulSoup对象解析HTML
-    soup = BeautifulSoup(raw_html, 'html.parser')
+    # 整页HTML只解析一次（优先使用lxml），参数表格直接从解析结果中取节点；明显没有文档内容的页面不做解析
+    if has_doc_content(raw_html):
+        root = parse_doc_html(raw_html)
+    else:
+        logger.debug("页面HTML中没有文档内容标记，跳过HTML解析")
+        root = None
     
     # 提取标题 - 尝试多种方式
     title = ""
@@ -391,7 +322,7 @@ def post_process_content(json_content):
     # 1. 首先尝试提取一二级标题
     if "level1_2_title" in content and content["level1_2_title"]:
         level1_2_text = clean_text(content["level1_2_title"])
-        print(f"提取到一二级标题文本: {level1_2_text}")
+        logger.debug("提取到一二级标题文本: %s", level1_2_text)
         
         # 处理可能包含 ">" 的文本
         if '>' in level1_2_text:
@@ -399,65 +330,19 @@ def post_process_content(json_content):
             if len(level_parts) >= 2:
                 level1_title = clean_text(level_parts[0])
                 level2_title = clean_text(level_parts[1])
-                print(f"分离出一级标题: {level1_title}, 二级标题: {level2_title}")
+                logger.debug("分离出一级标题: %s, 二级标题: %s", level1_title, level2_title)
         else:
             # 如果没有分隔符，可能整个就是一级标题
             level1_title = level1_2_text
-            print(f"提取出单一标题(视为一级): {level1_title}")
-    
-    # 2. 如果从level1_2_title无法提取，尝试从HTML直接提取
-    if not level1_title and not level2_title:
-        try:
-            # 从索引构建选择器 - 假设content中有index信息，或从URL中提取
-            index_match = re.search(r'index=(\d+-\d+-\d+)', str(content))
-            if index_match:
-                index = index_match.group(1)
-                level1_2_selector = f'#div{index}_1 > p'
-                level1_2_element = soup.select_one(level1_2_selector)
-                if level1_2_element:
-                    level1_2_text = clean_text(level1_2_element.get_text())
-                    print(f"从HTML直接提取一二级标题: {level1_2_text}")
-                    # 处理分隔符
-                    if '>' in level1_2_text:
-                        level_parts = level1_2_text.split('>')
-                        if len(level_parts) >= 2:
-                            level1_title = clean_text(level_parts[0])
-                            level2_title = clean_text(level_parts[1])
-                    else:
-                        level1_title = level1_2_text
-        except Exception as e:
-            print(f"提取一二级标题时出错: {str(e)}")
+            logger.debug("提取出单一标题(视为一级): %s", level1_title)
     
-    # 3. 尝试提取三级标题
+    # 2. 提取三级标题（页面上的各种三级标题写法都已包含在 raw_title 的选择器中）
     level3_title = ""
     if "raw_title" in content and content["raw_title"]:
         level3_title = clean_text(content["raw_title"])
-        print(f"提取到三级标题: {level3_title}")
-    
-    # 4. 如果没有找到三级标题，尝试从HTML直接提取
-    if not level3_title:
-        # 尝试从HTML直接提取三级标题
-        level3_selectors = [
-            'div.containerFlex .flex-item p', 
-            'div.containerFlex h3', 
-            'h3.api-section-title',
-            '.api-title',
-            '.page-title h3',
-            '.main-content h3'
-        ]
-        
-        for selector in level3_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                potential_title = clean_text(element.get_text())
-                if potential_title and len(potential_title) > 3 and len(potential_title) < 100:
-                    level3_title = potential_title
-                    print(f"从选择器 '{selector}' 直接提取到三级标题: {level3_title}")
-                    break
-            if level3_title:
-                break
-    
-    # 5. 组合完整标题
+        logger.debug("提取到三级标题: %s", level3_title)
+    
+    # 3. 组合完整标题
     if level1_title and level2_title and level3_title:
         title = f"{level1_title} > {level2_title} > {level3_title}"
     elif level1_title and level2_title:
@@ -467,7 +352,7 @@ def post_process_content(json_content):
     elif content.get("title"):
         title = clean_text(content["title"])
     
-    print(f"最终组合的标题: {title}")
+    logger.debug("最终组合的标题: %s", title)
     
     # 创建结构化输出对象 - 只保留需要的字段（删除description和api_endpoint）
     structured_content = {
@@ -477,30 +362,90 @@ def post_process_content(json_content):
         "python_example": clean_python_example(content.get("python_example", "")),
     }
     
-    # 处理请求参数表格
-    request_table_html = content.get("request_params_table", "")
-    if request_table_html:
-        structured_content["request_params"] = extract_params_from_table(request_table_html, "request")
+    # 处理请求参数表格 - 优先复用已解析的节点，避免重复解析
+    request_table = find_params_table(root, 'pane-request0')
+    if request_table is None:
+        request_table = content.get("request_params_table") or None
+    if request_table is not None:
+        structured_content["request_params"] = extract_params_from_table(request_table, "request")
     
     # 处理响应参数表格
-    response_table_html = content.get("response_params_table", "")
-    if response_table_html:
-        structured_content["response_params"] = extract_params_from_table(response_table_html, "response")
+    response_table = find_params_table(root, 'pane-response0')
+    if response_table is None:
+        response_table = content.get("response_params_table") or None
+    if response_table is not None:
+        structured_content["response_params"] = extract_params_from_table(response_table, "response")
     
     return [structured_content]
 
-def extract_params_from_table(table_html, table_type):
-    """使用BeautifulSoup从HTML表格中提取参数信息"""
-    params = []
-    soup = BeautifulSoup(table_html, 'html.parser')
+# XPath按class中的单词匹配，与BeautifulSoup的class_参数语义一致
+_ROW_XPATH = ".//tr[contains(concat(' ', normalize-space(@class), ' '), ' el-table__row ')]"
+_CELL_XPATH = ".//div[contains(concat(' ', normalize-space(@class), ' '), ' cell ')]"
+_TABLE_XPATH = ".//*[contains(concat(' ', normalize-space(@class), ' '), ' el-table ')]"
+
+def parse_doc_html(raw_html):
+    """解析页面HTML：安装了lxml时返回lxml根节点，否则返回BeautifulSoup对象；解析失败时返回None"""
+    if lxml_html is not None:
+        try:
+            return lxml_html.document_fromstring(raw_html)
+        except etree.ParserError:
+            return None
+    return BeautifulSoup(raw_html, HTML_PARSER, parse_only=CONTENT_STRAINER)
+
+def find_params_table(root, pane_id):
+    """在已解析的页面中查找参数面板下的表格节点（lxml元素或BeautifulSoup的Tag），找不到时返回None"""
+    if root is None:
+        return None
+    if isinstance(root, Tag):
+        pane = root.find(id=pane_id)
+        return pane.find(class_='el-table') if pane is not None else None
+    panes = root.xpath('//*[@id=$pane_id]', pane_id=pane_id)
+    if not panes:
+        return None
+    tables = panes[0].xpath(_TABLE_XPATH)
+    return tables[0] if tables else None
+
+def table_cell_texts(table):
+    """返回表格中每个参数行的单元格文本列表；完全解析不出表格行时返回None
     
-    # 查找所有表格行
-    rows = soup.select('tr.el-table__row')
+    table 可以是HTML字符串、lxml元素或BeautifulSoup的Tag；只有字符串需要解析，节点直接遍历
+    """
+    if isinstance(table, str):
+        if lxml_html is not None:
+            try:
+                table = lxml_html.fromstring(table)
+            except etree.ParserError:
+                return None
+        else:
+            table = BeautifulSoup(table, HTML_PARSER)
     
-    for row in rows:
-        # 查找所有单元格
-        cells = row.select('div.cell')
-        
+    if isinstance(table, Tag):
+        if table.name != 'tr' and table.find('tr') is None:
+            return None
+        return [
+            [clean_text(cell.get_text()) for cell in row.find_all('div', class_='cell')]
+            for row in table.find_all('tr', class_='el-table__row')
+        ]
+    
+    # 表格行遍历直接交给lxml在C层完成，避免BeautifulSoup逐个节点的开销
+    if table.tag != 'tr' and table.find('.//tr') is None:
+        return None
+    return [
+        [clean_text(cell.text_content()) for cell in row.xpath(_CELL_XPATH)]
+        for row in table.xpath(_ROW_XPATH)
+    ]
+
+def extract_params_from_table(table, table_type):
+    """从HTML表格中提取参数信息，table可以是lxml元素、Tag节点或HTML字符串"""
+    rows = table_cell_texts(table)
+    
+    # 只有在完全解析不出表格行时才退回正则表达式；有行但无参数说明表格本身为空
+    if rows is None:
+        # 已解析的节点中没有表格行时正则表达式也找不到，只有原始字符串值得再试一次
+        return extract_params_from_table_regex(table, table_type) if isinstance(table, str) else []
+    
+    params = []
+    for cells in rows:
         if len(cells) < 3:
             continue
             
@@ -508,39 +453,34 @@ def extract_params_from_table(table_html, table_type):
         
         if table_type == "request" and len(cells) >= 4:
             param = {
-                "name": clean_text(cells[0].get_text()),
-                "type": clean_text(cells[1].get_text()),
-                "required": "必选" in clean_text(cells[2].get_text()),
-                "option": clean_text(cells[2].get_text()),
-                "description": clean_text(cells[3].get_text())
+                "name": cells[0],
+                "type": cells[1],
+                "required": "必选" in cells[2],
+                "option": cells[2],
+                "description": cells[3]
             }
         elif table_type == "response" and len(cells) >= 3:
             param = {
-                "name": clean_text(cells[0].get_text()),
-                "type": clean_text(cells[1].get_text()),
-                "description": clean_text(cells[2].get_text())
+                "name": cells[0],
+                "type": cells[1],
+                "description": cells[2]
             }
         
         if param:
             params.append(param)
     
-    # 如果使用BeautifulSoup未能提取到参数，尝试使用正则表达式
-    if not params:
-        return extract_params_from_table_regex(table_html, table_type)
-    
     return params
 
 def extract_params_from_table_regex(table_html, table_type):
     """使用正则表达式从HTML表格中提取参数信息（备用方法）"""
-    import re
     params = []
     
     # 提取表格行
-    rows = re.findall(r'<tr class="el-table__row[^>]*>(.*?)</tr>', table_html, re.DOTALL)
+    rows = _ROW_RE.findall(table_html)
     
     for row in rows:
         # 提取单元格
-        cells = re.findall(r'<div class="cell">(.*?)</div>', row, re.DOTALL)
+        cells = _CELL_RE.findall(row)
         
         if len(cells) < 3:
             continue
@@ -569,19 +509,17 @@ def extract_params_from_table_regex(table_html, table_type):
 
 def clean_html(html_text):
     """清理HTML标签并规范化文本"""
-    import re
     if not html_text:
         return ""
     
     # 移除HTML标签
-    text = re.sub(r'<[^>]+>', ' ', html_text)
+    text = _TAG_RE.sub(' ', html_text)
     # 移除多余空白
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     return text
 
 def clean_python_example(python_code):
     """清理和格式化Python示例代码"""
-    import re
     if not python_code:
         return ""
     
@@ -589,18 +527,22 @@ def clean_python_example(python_code):
     code = python_code.strip()
     
     # 修复常见问题：缺少空格的import语句、url赋值等
-    code = re.sub(r'import(\w+)', r'import \1', code)
-    code = re.sub(r'url=f"', r'url = f"', code)
-    code = re.sub(r'data=requests', r'data = requests', code)
-    code = re.sub(r'print\(', r'print(', code)
+    code = _IMPORT_RE.sub(r'import \1', code)
+    code = _URL_ASSIGN_RE.sub('url = f"', code)
+    code = _DATA_ASSIGN_RE.sub('data = requests', code)
     
     return code
 
-async def crawl_with_table_navigation(indices: List[str]):
+
+async def crawl_with_table_navigation(indices: List[str], concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE):
     # 创建输出目录
     output_dir = "tsanghi_docs"
     os.makedirs(output_dir, exist_ok=True)
     
+    # 一次性读取已有的结果文件名，已爬取（doc_）或确认为空（empty_）的索引直接跳过
+    with os.scandir(output_dir) as entries:
+        existing_files = {entry.name for entry in entries}
+    
     # 配置浏览器
     browser_config = BrowserConfig(
         headless=True,  # 设置为True提高性能
@@ -608,65 +550,73 @@ async def crawl_with_table_navigation(indices: List[str]):
         viewport_width=1280,
         viewport_height=800,
         # 尝试在浏览器配置中设置用户代理
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+        user_agent=BROWSER_HEADERS["User-Agent"],
+        headers=BROWSER_HEADERS
     )
     
-    # 初始化爬虫
-    async with AsyncWebCrawler(config=browser_config, default_timeout=120000) as crawler:
-        results = {}
+    # 页面解析使用的进程池，爬取结束后统一关闭
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        # 初始化爬虫
+        async with AsyncWebCrawler(config=browser_config, default_timeout=120000) as crawler:
+            results = {}
         
-        # 添加进度跟踪
-        total = len(indices)
-        completed = 0
+            # 添加进度跟踪
+            total = len(indices)
+            completed = 0
         
-        # 使用信号量控制并发数量，避免过多请求导致被封
-        semaphore = asyncio.Semaphore(3)  # 进一步降低并发数量到2
+            # 使用信号量控制并发数量，避免过多请求导致被封
+            semaphore = asyncio.Semaphore(concurrency)
+            # 令牌桶限制全局请求速率，各任务共享同一额度，不必各自sleep
+            limiter = AsyncLimiter(rate, 1.0)
         
-        async def process_index(index):
-            nonlocal completed
-            async with semaphore:
-                try:
-                    # 尝试爬取页面，最多重试3次
-                    for attempt in range(3):  # 增加到4次尝试
-                        try:
-                            # 增加随机延迟，避免被检测为爬虫
-                            delay = 3 + random.random() * 5  # 5-10秒的随机延迟
-                            await asyncio.sleep(delay)
-                            
-                            result = await crawl_doc_page(crawler, index, output_dir)
+            async def process_index(index):
+                nonlocal completed
+                if f"doc_{index}.json" in existing_files or f"empty_{index}.json" in existing_files:
+                    completed += 1
+                    logger.info(f"索引 {index} 已有结果，跳过爬取")
+                    return
+            
+                async with semaphore:
+                    try:
+                        # 尝试爬取页面，最多重试3次
+                        for attempt in range(3):
+                            try:
+                                async with limiter:
+                                    result = await crawl_doc_page(crawler, index, output_dir, executor)
                             
-                            # 检查是否为空页面标记
-                            if result and isinstance(result, dict) and result.get("is_empty_page"):
-                                logger.info(f"确认索引 {index} 为空页面，不再重试")
-                                # 可选：创建一个标记文件表示此页面已检查但为空
-                                empty_file = os.path.join(output_dir, f"empty_{index}.json")
-                                with open(empty_file, "w", encoding="utf-8") as f:
-                                    json.dump({"index": index, "status": "empty", "checked_time": time.strftime("%Y-%m-%d %H:%M:%S")}, f)
-                                break  # 跳出重试循环
+                                # 检查是否为空页面标记
+                                if result and isinstance(result, dict) and result.get("is_empty_page"):
+                                    logger.info(f"确认索引 {index} 为空页面，不再重试")
+                                    # 可选：创建一个标记文件表示此页面已检查但为空
+                                    empty_file = os.path.join(output_dir, f"empty_{index}.json")
+                                    async with aiofiles.open(empty_file, "w", encoding="utf-8") as f:
+                                        await f.write(json.dumps({"index": index, "status": "empty", "checked_time": time.strftime("%Y-%m-%d %H:%M:%S")}))
+                                    break  # 跳出重试循环
                             
-                            if result:
-                                results[index] = result
-                                break
-                            elif attempt < 3:  # 如果失败且不是最后一次尝试
-                                print(f"重试爬取索引 {index}...")
-                                await asyncio.sleep(10)  # 等待10秒后重试
-                        except Exception as e:
-                            print(f"尝试 {attempt+1} 爬取索引 {index} 失败: {str(e)}")
-                            if attempt < 3:
-                                await asyncio.sleep(10)
-                except Exception as e:
-                    print(f"处理索引 {index} 时发生错误: {str(e)}")
-                finally:
-                    completed += 1
-                    print(f"进度: {completed}/{total} ({completed/total*100:.2f}%)")
+                                if result:
+                                    results[index] = result
+                                    break
+                                elif attempt < 2:  # 如果失败且不是最后一次尝试
+                                    print(f"重试爬取索引 {index}...")
+                                    await asyncio.sleep(10)  # 等待10秒后重试
+                            except Exception as e:
+                                print(f"尝试 {attempt+1} 爬取索引 {index} 失败: {str(e)}")
+                                if attempt < 2:
+                                    await asyncio.sleep(10)
+                    except Exception as e:
+                        print(f"处理索引 {index} 时发生错误: {str(e)}")
+                    finally:
+                        completed += 1
+                        print(f"进度: {completed}/{total} ({completed/total*100:.2f}%)")
         
-        # 创建所有任务
-        tasks = [process_index(index) for index in indices]
+            # 创建所有任务
+            tasks = [asyncio.create_task(process_index(index)) for index in indices]
         
-        # 等待所有任务完成
-        await asyncio.gather(*tasks)
+            # 按完成顺序等待所有任务，慢页面不会阻塞其他结果的处理
+            for task in asyncio.as_completed(tasks):
+                await task
         
-        print(f"爬取完成，共爬取 {len(results)} 个页面")
+            print(f"爬取完成，共爬取 {len(results)} 个页面")
 
 async def main():
     indices = generate_indices()
@@ -677,35 +627,22 @@ async def main():
     
     parser = argparse.ArgumentParser(description='爬取Tsanghi文档')
     parser.add_argument('--test', action='store_true', help='测试模式，只爬取少量页面')
-    parser.add_argument('--resume', action='store_true', help='从上次中断的地方继续爬取')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'同时爬取的页面数量，默认 {DEFAULT_CONCURRENCY}')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help=f'每秒最多发起的页面请求数，默认 {DEFAULT_RATE}')
+    parser.add_argument('--debug', action='store_true', help='以缩进格式保存结果文件，便于调试查看')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的地方继续爬取（已爬取的索引现在总会自动跳过，保留此参数以兼容旧命令）')
     args = parser.parse_args()
     
+    global PRETTY_JSON
+    PRETTY_JSON = args.debug
+    
     if args.test:
         # 测试模式，只爬取少量页面
         test_indices = indices[:5]
         logger.info(f"测试模式：仅爬取 {len(test_indices)} 个页面")
-        await crawl_with_table_navigation(test_indices)
-    elif args.resume:
-        # 断点续传模式
-        output_dir = "tsanghi_docs"
-        completed_indices = set()
-        
-        # 检查已经完成的索引
-        if os.path.exists(os.path.join(output_dir, "all_results.json")):
-            try:
-                with open(os.path.join(output_dir, "all_results.json"), "r", encoding="utf-8") as f:
-                    completed_results = json.load(f)
-                    completed_indices = set(completed_results.keys())
-                    logger.info(f"找到 {len(completed_indices)} 个已完成的索引")
-            except Exception as e:
-                logger.error(f"读取已完成索引时出错: {str(e)}")
-        
-        # 过滤出未完成的索引
-        remaining_indices = [idx for idx in indices if idx not in completed_indices]
-        logger.info(f"继续爬取剩余的 {len(remaining_indices)} 个索引")
-        await crawl_with_table_navigation(remaining_indices)
+        await crawl_with_table_navigation(test_indices, args.concurrency, args.rate)
     else:
-        await crawl_with_table_navigation(indices)
+        await crawl_with_table_navigation(indices, args.concurrency, args.rate)
 
     # 在爬取完成后调用清理函数
     if not args.test:
@@ -713,14 +650,21 @@ async def main():
         removed_count = cleanup_empty_files("tsanghi_docs")
         print(f"清理完成，删除了 {removed_count} 个空文件")
 
+# 大于该字节数的结果文件必然包含参数内容，清理时无需打开解析
+EMPTY_FILE_MAX_SIZE = 512
+
 def cleanup_empty_files(output_dir):
     """删除空的或无效的JSON文件"""
     count_removed = 0
-    for filename in os.listdir(output_dir):
-        if not filename.endswith('.json'):
-            continue
-        
-        filepath = os.path.join(output_dir, filename)
+    with os.scandir(output_dir) as entries:
+        candidates = [
+            entry for entry in entries
+            if entry.name.endswith('.json') and entry.stat().st_size <= EMPTY_FILE_MAX_SIZE
+        ]
+    
+    for entry in candidates:
+        filename = entry.name
+        filepath = entry.path
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = json.load(f)
@@ -1,22 +1,26 @@
 #!/usr/bin/env python3
 import asyncio
-import json
+import atexit
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Any, Dict, List, Optional, Union
 import httpx
+import orjson
 from fastapi import FastAPI, Request, Response
-from fastapi.middleware.cors import CORSMiddleware
-from sse_starlette.sse import EventSourceResponse
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 from mcp.server.fastmcp import FastMCP
+from mcp.types import LATEST_PROTOCOL_VERSION, Implementation, InitializeResult
 from mcp.server.sse import SseServerTransport
 from starlette.applications import Starlette
 from starlette.routing import Mount, Route
 import uvicorn
-import datetime
 import argparse
 import time
-import inspect
+import types
 import tools
 import sys
 import importlib
@@ -24,65 +28,230 @@ import importlib
 # 导入工具函数
 from tools import *
 
-# 配置日志
+# 配置日志：记录先放入队列，由后台线程写入文件，避免磁盘写入阻塞事件循环
+# 格式化在入队时完成，文件处理器只负责写入已格式化的消息
+log_queue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.FileHandler('fin_mcp_server.log'))
+log_listener.start()
+atexit.register(log_listener.stop)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename='fin_mcp_server.log'
+    handlers=[QueueHandler(log_queue)]
 )
 logger = logging.getLogger("fin-mcp-server")
 
 # 初始化 FastMCP 服务器
 mcp = FastMCP("fin-data")
 
-# 导入所有工具函数
-from tools import *
-# 如果有其他工具模块，也导入它们
-# from tools_code.generated_functions import *
-
 # 批量注册工具函数
-import inspect
-import tools
-# 如果有其他工具模块，也导入它们
-import sys
-import importlib
+def iter_module_functions(module):
+    """直接遍历模块字典，返回该模块自身定义的公开函数（不包含从其他模块导入的函数和下划线开头的内部函数）"""
+    return [
+        (name, func) for name, func in vars(module).items()
+        if isinstance(func, types.FunctionType) and func.__module__ == module.__name__
+        and not name.startswith('_')
+    ]
+
+def add_tools(funcs):
+    """一次性把收集到的函数注册为 MCP 工具，不再为每个函数构造 mcp.tool() 装饰器"""
+    for func in funcs:
+        mcp.add_tool(func)
 
 # 手动注册一些特定工具（如果需要）
-mcp.tool()(restart_server)
-mcp.tool()(get_exchange_list)
-
-# 自动注册tools模块中的所有函数
-for name, func in inspect.getmembers(tools, inspect.isfunction):
-    # 跳过已经手动注册的函数
-    if name not in ['restart_server', 'get_exchange_list']:
-        mcp.tool()(func)
-
-# 如果您有tools_code目录下的多个模块需要注册
-# 可以遍历目录下的所有Python文件
-tools_dir = 'tools_code'
-if os.path.exists(tools_dir):
-    for filename in os.listdir(tools_dir):
-        if filename.endswith('.py') and filename != '__init__.py':
-            module_name = f'tools_code.{filename[:-3]}'
-            try:
-                module = importlib.import_module(module_name)
-                for name, func in inspect.getmembers(module, inspect.isfunction):
-                    mcp.tool()(func)
-            except ImportError as e:
-                logger.error(f"无法导入模块 {module_name}: {e}")
+MANUAL_TOOLS = (restart_server,)
+
+# tools_code 目录下的其他工具模块
+TOOLS_DIR = 'tools_code'
+
+_tools_registered = False
+
+def register_all_tools():
+    """收集并注册所有工具函数；只在启动服务器时调用，单纯导入本模块不会触发，重复调用无副作用"""
+    global _tools_registered
+    if _tools_registered:
+        return
+    _tools_registered = True
+
+    tool_funcs = list(MANUAL_TOOLS)
+    # tools 模块中不属于工具的函数（生命周期钩子、通用请求函数等）与 DISPATCH 使用同一份名单
+    skip_names = frozenset(func.__name__ for func in MANUAL_TOOLS) | tools.NON_TOOL_FUNCTIONS
+
+    # 自动收集tools模块中的所有函数
+    for name, func in iter_module_functions(tools):
+        # 跳过已经手动注册的函数和不属于工具的函数
+        if name not in skip_names:
+            tool_funcs.append(func)
+
+    # 遍历tools_code目录下的所有Python文件
+    if os.path.exists(TOOLS_DIR):
+        with os.scandir(TOOLS_DIR) as entries:
+            module_names = [
+                f'tools_code.{entry.name[:-3]}' for entry in entries
+                if entry.is_file() and entry.name.endswith('.py') and entry.name != '__init__.py'
+            ]
+        # 在线程池中并发导入模块，注册仍在主线程中进行（FastMCP 的注册表不是线程安全的）
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            futures = {executor.submit(importlib.import_module, name): name for name in module_names}
+            for future in as_completed(futures):
+                module_name = futures[future]
+                try:
+                    module = future.result()
+                except ImportError as e:
+                    logger.error(f"无法导入模块 {module_name}: {e}")
+                    continue
+                tool_funcs.extend(func for name, func in iter_module_functions(module))
+
+    add_tools(tool_funcs)
 
 # 创建 FastAPI 应用
 app = FastAPI(title="金融数据 MCP 服务器")
 
+@app.on_event("startup")
+async def register_tools_on_startup():
+    """多进程或 --reload 时每个工作进程单独导入应用，在启动时注册工具并预热 HTTP 客户端和基础数据"""
+    register_all_tools()
+    await tools.startup()
+
+@app.on_event("shutdown")
+async def shutdown_tools():
+    """关闭工具共享的 HTTP 客户端"""
+    await tools.shutdown()
+
+# CORS 响应头，启动时预先编码（允许所有来源，在生产环境中应该限制为特定域名）
+CORS_HEADERS = [
+    (b"access-control-allow-credentials", b"true"),
+    (b"access-control-expose-headers", b"Content-Type, X-Accel-Buffering"),
+]
+CORS_PREFLIGHT_HEADERS = CORS_HEADERS + [
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+    (b"access-control-max-age", b"600"),
+]
+
+class StaticCORSMiddleware:
+    """允许所有来源的轻量 CORS 中间件：直接追加预先编码的响应头，不做逐项的配置检查"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        origin = request_headers.get(b"origin")
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 预检请求直接返回，不进入路由
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in request_headers:
+            headers = CORS_PREFLIGHT_HEADERS + [
+                (b"access-control-allow-origin", origin),
+                (b"access-control-allow-headers", request_headers.get(b"access-control-request-headers", b"*")),
+                (b"vary", b"Origin"),
+            ]
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        # 携带 cookie 的请求不能使用通配符，需要回显来源
+        if b"cookie" in request_headers:
+            extra_headers = CORS_HEADERS + [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        else:
+            extra_headers = CORS_HEADERS + [(b"access-control-allow-origin", b"*")]
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + extra_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
 # 添加 CORS 中间件
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # 在生产环境中应该限制为特定域名
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["*"],
-    expose_headers=["Content-Type", "X-Accel-Buffering"],
-)
+app.add_middleware(StaticCORSMiddleware)
+
+def sse_bytes(event: bytes, payload: bytes) -> bytes:
+    """把事件直接编码成 SSE 报文字节，EventSourceResponse 会原样发送，不再经过 ServerSentEvent 格式化"""
+    return b"event: " + event + b"\ndata: " + payload + b"\n\n"
+
+# GET 连接建立时发送的事件，内容固定
+SSE_CONNECTED_EVENT = sse_bytes(b"connected", orjson.dumps({
+    "status": "connected",
+    "message": "MCP 服务器连接已建立，请使用 POST 请求发送 MCP 消息"
+}))
+
+# SSE 心跳间隔（秒）
+HEARTBEAT_INTERVAL = 30
+
+def heartbeat_event() -> ServerSentEvent:
+    """生成 SSE 心跳事件"""
+    return ServerSentEvent(
+        event="heartbeat",
+        data=orjson.dumps({"timestamp": time.time_ns()}).decode(),
+    )
+
+# tools/list 的结果只取决于已注册的工具，以工具数量作为缓存键（与 build_tools_list_json 相同），注册新工具后自动重建
+_tools_list_result: Optional[tuple[int, dict]] = None
+
+async def tools_list_result() -> dict:
+    """返回 tools/list 的结果，工具数量不变时复用"""
+    global _tools_list_result
+    tool_count = len(mcp._tool_manager.list_tools())
+    if _tools_list_result is None or _tools_list_result[0] != tool_count:
+        mcp_tools = await mcp.list_tools()
+        _tools_list_result = (tool_count, {"tools": [tool.model_dump(mode="json", exclude_none=True) for tool in mcp_tools]})
+    return _tools_list_result[1]
+
+# initialize 的结果只取决于服务器本身，首次请求时生成后复用
+_initialize_result: Optional[dict] = None
+
+def initialize_result() -> dict:
+    """返回 initialize 的结果，能力声明取自 FastMCP 底层服务器的初始化选项"""
+    global _initialize_result
+    if _initialize_result is None:
+        options = mcp._mcp_server.create_initialization_options()
+        _initialize_result = InitializeResult(
+            protocolVersion=LATEST_PROTOCOL_VERSION,
+            capabilities=options.capabilities,
+            serverInfo=Implementation(name=options.server_name, version=options.server_version),
+            instructions=options.instructions,
+        ).model_dump(mode="json", exclude_none=True)
+    return _initialize_result
+
+async def call_tool_result(params: dict) -> dict:
+    """调用工具，工具执行失败时按 MCP 约定返回 isError 结果，而不是让异常中断 SSE 响应"""
+    try:
+        contents = await mcp.call_tool(params["name"], params.get("arguments") or {})
+    except Exception as e:
+        logger.error("调用工具 %s 失败: %s", params.get("name"), e)
+        return {"content": [{"type": "text", "text": str(e)}], "isError": True}
+    return {"content": [content.model_dump(mode="json", exclude_none=True) for content in contents]}
+
+async def handle_message(body: dict) -> Optional[dict]:
+    """处理一条 MCP JSON-RPC 消息
+    
+    initialize 和 tools/list 返回缓存的结果，tools/call 转发到 FastMCP 的 call_tool；
+    没有 id 的通知消息（如 notifications/initialized）不需要回复，返回 None
+    """
+    if "id" not in body:
+        return None
+    method = body.get("method")
+    params = body.get("params") or {}
+    if method == "initialize":
+        result = initialize_result()
+    elif method == "tools/list":
+        result = await tools_list_result()
+    elif method == "tools/call":
+        if "name" not in params:
+            return {"jsonrpc": "2.0", "id": body["id"], "error": {"code": -32602, "message": "缺少参数: name"}}
+        result = await call_tool_result(params)
+    elif method == "ping":
+        result = {}
+    else:
+        return {"jsonrpc": "2.0", "id": body["id"], "error": {"code": -32601, "message": f"不支持的方法: {method}"}}
+    return {"jsonrpc": "2.0", "id": body["id"], "result": result}
 
 # SSE 端点 - 支持 GET 和 POST
 @app.get("/mcp-sse")
@@ -96,42 +265,32 @@ async def mcp_sse(request: Request):
         try:
             if request.method == "POST":
                 # 从请求中获取 MCP 消息
-                body = await request.json()
-                logger.info(f"收到 MCP 消息: {json.dumps(body)}")
+                raw_body = await request.body()
+                body = orjson.loads(raw_body)
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("收到 MCP 消息: %s", raw_body.decode())
                 
-                # 处理 MCP 消息
-                response = await mcp.handle_message(body)
-                logger.info(f"MCP 响应: {json.dumps(response)}")
-                
-                # 发送响应
-                yield {
-                    "event": "message",
-                    "data": json.dumps(response)
-                }
+                # 处理 MCP 消息，通知消息没有响应
+                response = await handle_message(body)
+                if response is not None:
+                    payload = orjson.dumps(response)
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("MCP 响应: %s", payload.decode())
+                    
+                    # 发送响应
+                    yield sse_bytes(b"message", payload)
             else:  # GET 请求
                 # 对于 GET 请求，建立 SSE 连接
-                yield {
-                    "event": "connected",
-                    "data": json.dumps({
-                        "status": "connected",
-                        "message": "MCP 服务器连接已建立，请使用 POST 请求发送 MCP 消息"
-                    })
-                }
-                while True:
-                    await asyncio.sleep(30)
-                    yield {
-                        "event": "heartbeat",
-                        "data": json.dumps({"timestamp": str(datetime.datetime.now())})
-                    }
+                yield SSE_CONNECTED_EVENT
+                # 保持连接打开直到客户端断开，心跳由 EventSourceResponse 的 ping 机制发送
+                while not await request.is_disconnected():
+                    await asyncio.sleep(HEARTBEAT_INTERVAL)
                     
             logger.info(f"SSE 连接已建立: 客户端={client_host}")
         except Exception as e:
             logger.error(f"处理 MCP 请求错误: {str(e)}, 客户端={client_host}")
             logger.exception("详细错误信息:")
-            yield {
-                "event": "error",
-                "data": json.dumps({"error": str(e)})
-            }
+            yield sse_bytes(b"error", orjson.dumps(tools.error_dict(e)))
         finally:
             logger.info(f"SSE 连接已关闭: 客户端={client_host}")
     
@@ -143,28 +302,46 @@ async def mcp_sse(request: Request):
         "X-Accel-Buffering": "no"  # 对于 Nginx 代理很重要
     }
     
-    return EventSourceResponse(event_generator(), headers=headers)
+    return EventSourceResponse(
+        event_generator(),
+        headers=headers,
+        ping=HEARTBEAT_INTERVAL,
+        ping_message_factory=heartbeat_event,
+    )
 
 # 添加一个直接的工具列表端点，用于调试
-@app.get("/tools/list")
-async def list_tools():
-    """列出所有可用的 MCP 工具"""
+@lru_cache(maxsize=1)
+def build_tools_list_json(tool_count: int) -> bytes:
+    """序列化工具列表；以工具数量作为缓存键，开发时热重载注册新工具后会自动重建"""
     tools_info = []
-    for tool in mcp.tools:
+    for tool in mcp._tool_manager.list_tools():
         tool_info = {
-            "name": tool.__name__,
-            "description": tool.__doc__,
-            "parameters": {}  # 这里可以添加参数信息
+            "name": tool.name,
+            "description": tool.description,
+            "parameters": tool.parameters
         }
         tools_info.append(tool_info)
     
-    return {"tools": tools_info}
+    return orjson.dumps({"tools": tools_info})
+
+@app.get("/tools/list")
+async def list_tools():
+    """列出所有可用的 MCP 工具"""
+    tool_count = len(mcp._tool_manager.list_tools())
+    return Response(content=build_tools_list_json(tool_count), media_type="application/json")
+
+# 健康检查端点，响应内容固定，启动时预先序列化
+HEALTH_RESPONSE = orjson.dumps({"status": "ok", "service": "fin-mcp-server"})
 
-# 健康检查端点
 @app.get("/health")
 async def health_check():
     """健康检查端点"""
-    return {"status": "ok", "service": "fin-mcp-server"}
+    return Response(content=HEALTH_RESPONSE, media_type="application/json")
+
+@app.get("/debug/cache")
+async def debug_cache():
+    """查看 API 响应缓存的命中情况"""
+    return Response(content=orjson.dumps(tools.cache_stats()), media_type="application/json")
 
 def create_starlette_app(mcp_server, *, debug: bool = False) -> Starlette:
     """创建一个 Starlette 应用，用于 SSE 传输"""
@@ -192,6 +369,8 @@ def create_starlette_app(mcp_server, *, debug: bool = False) -> Starlette:
             Route("/sse", endpoint=handle_sse),  # SSE 连接端点
             Mount("/messages/", app=sse.handle_post_message),  # 消息发送端点
         ],
+        on_startup=[tools.startup],
+        on_shutdown=[tools.shutdown],
     )
 
 # 主函数
@@ -204,12 +383,28 @@ if __name__ == "__main__":
                         help='服务器绑定的主机 (用于 sse 和 fastapi 模式)')
     parser.add_argument('--port', type=int, default=8000, 
                         help='服务器监听的端口 (用于 sse 和 fastapi 模式)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='工作进程数 (仅用于 fastapi 模式；sse 模式的会话保存在进程内存中，只能单进程运行)')
     args = parser.parse_args()
 
-    # 确保MCP服务器完全初始化
-    logger.info("正在初始化MCP服务器...")
-    time.sleep(1)  # 给服务器一些初始化时间
-    
+    # 优先使用 uvloop 事件循环和 httptools 解析器，未安装时（如 Windows）退回默认实现；
+    # 设置环境变量 USE_UVLOOP=0 可强制使用标准 asyncio 事件循环
+    uvicorn_loop = "asyncio"
+    if os.environ.get("USE_UVLOOP", "1") != "0":
+        try:
+            import uvloop
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            uvicorn_loop = "uvloop"
+        except ImportError:
+            pass
+    try:
+        import httptools  # noqa: F401
+        uvicorn_http = "httptools"
+    except ImportError:
+        uvicorn_http = "h11"
+
+    register_all_tools()
+
     # 根据传输模式启动服务器
     if args.transport == 'stdio':
         # 使用 stdio 传输模式运行
@@ -220,8 +415,11 @@ if __name__ == "__main__":
         logger.info(f"使用 SSE 传输模式启动 MCP 服务器，监听 {args.host}:{args.port}")
         mcp_server = mcp._mcp_server  # 获取底层 MCP 服务器
         starlette_app = create_starlette_app(mcp_server, debug=True)
-        uvicorn.run(starlette_app, host=args.host, port=args.port)
+        uvicorn.run(starlette_app, host=args.host, port=args.port, loop=uvicorn_loop, http=uvicorn_http)
     else:  # fastapi 模式
         # 使用 FastAPI 运行
-        logger.info(f"使用 FastAPI 模式启动 MCP 服务器，监听 {args.host}:{args.port}")
-        uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
+        logger.info(f"使用 FastAPI 模式启动 MCP 服务器，监听 {args.host}:{args.port}，工作进程数 {args.workers}")
+        # 多进程时 uvicorn 需要以导入字符串的形式加载应用，每个工作进程各自导入并注册工具
+        app_target = "server:app" if args.workers > 1 else app
+        uvicorn.run(app_target, host=args.host, port=args.port, workers=args.workers,
+                    loop=uvicorn_loop, http=uvicorn_http, log_config=None)
\ No newline at end of file
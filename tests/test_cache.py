@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+import unittest
+
+import tools
+
+class CacheTtlTest(unittest.TestCase):
+    def test_realtime(self):
+        self.assertEqual(tools._cache_ttl("stock/XNYS/daily/realtime", []), tools.REALTIME_CACHE_TTL)
+        self.assertEqual(tools._cache_ttl("forex/realtime", []), tools.REALTIME_CACHE_TTL)
+
+    def test_reference(self):
+        for endpoint in ("country", "forex/list", "stock/exchange", "stock/XNYS/list",
+                         "index/USA/constituent", "stock/XNYS/company/info"):
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(tools._cache_ttl(endpoint, []), tools.REFERENCE_CACHE_TTL)
+
+    def test_search_is_not_reference(self):
+        self.assertEqual(tools._cache_ttl("search/list", [("keywords", "apple")]), tools.HISTORICAL_CACHE_TTL)
+
+    def test_statement_with_past_end_date(self):
+        params = [("ticker", "AAPL"), ("end_date", "2020-12-31")]
+        self.assertEqual(tools._cache_ttl("stock/XNYS/income/statement/yearly", params), tools.STATEMENT_CACHE_TTL)
+
+    def test_open_ended_statement(self):
+        endpoint = "stock/XNYS/balance/sheet/quarterly"
+        self.assertEqual(tools._cache_ttl(endpoint, [("ticker", "AAPL")]), tools.HISTORICAL_CACHE_TTL)
+        self.assertEqual(tools._cache_ttl(endpoint, [("end_date", "2999-12-31")]), tools.HISTORICAL_CACHE_TTL)
+        self.assertEqual(tools._cache_ttl(endpoint, [("end_date", "latest")]), tools.HISTORICAL_CACHE_TTL)
+
+    def test_corporate_actions(self):
+        for suffix in ("split", "allot", "dividend"):
+            with self.subTest(suffix=suffix):
+                params = [("end_date", "2020-12-31")]
+                self.assertEqual(tools._cache_ttl(f"stock/XNYS/{suffix}", params), tools.HISTORICAL_CACHE_TTL)
+
+if __name__ == "__main__":
+    unittest.main()
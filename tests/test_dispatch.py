@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+import inspect
+import tempfile
+import unittest
+
+import httpx
+
+import tools
+from cache import FileCache
+
+# 各工具必选参数的示例值
+SAMPLE_ARGS = {
+    "exchange_code": "XNYS",
+    "country_code": "USA",
+    "ticker": "AAPL",
+    "tickers": "AAPL,MSFT",
+    "keywords": "apple",
+}
+
+# 必选参数之外还需要的参数（ticker 和 constituent 至少传一个）
+EXTRA_ARGS = {
+    "get_index_constituents": {"ticker": "000300"},
+}
+
+# 不调用沧海 API、返回字符串的工具
+STRING_TOOLS = {"restart_server", "get_beijing_time"}
+
+MOCK_DATA = {"ticker": "AAPL"}
+
+def mock_handler(request: httpx.Request) -> httpx.Response:
+    """所有请求都返回一条成功的响应"""
+    return httpx.Response(200, json={"code": 200, "msg": "操作成功", "data": MOCK_DATA})
+
+class CallToolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_cache = tools._file_cache
+        tools._file_cache = FileCache(self.tmp_dir.name)
+        tools._cache.clear()
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(mock_handler), base_url=tools.FIN_API_URL)
+        self.token = tools.http_client_var.set(self.client)
+
+    async def asyncTearDown(self):
+        tools.http_client_var.reset(self.token)
+        await self.client.aclose()
+        tools._file_cache = self.file_cache
+        tools._cache.clear()
+        for codes in (tools._COUNTRIES, tools._EXCHANGES, tools._FOREX_TICKERS):
+            codes.clear()
+        self.tmp_dir.cleanup()
+
+    def test_dispatch_contains_only_coroutine_tools(self):
+        for name, func in tools.DISPATCH.items():
+            self.assertTrue(inspect.iscoroutinefunction(func), name)
+        for name in tools.NON_TOOL_FUNCTIONS:
+            self.assertNotIn(name, tools.DISPATCH)
+
+    async def test_call_every_tool(self):
+        for name, func in tools.DISPATCH.items():
+            kwargs = {
+                param.name: SAMPLE_ARGS[param.name]
+                for param in inspect.signature(func).parameters.values()
+                if param.default is param.empty
+            }
+            kwargs.update(EXTRA_ARGS.get(name, {}))
+            with self.subTest(tool=name):
+                result = await tools.call_tool(name, **kwargs)
+                if name in STRING_TOOLS:
+                    self.assertIsInstance(result, str)
+                elif name.endswith("_many"):
+                    # 批量工具按代码返回每个请求的 data
+                    self.assertEqual(result, {ticker: MOCK_DATA for ticker in SAMPLE_ARGS["tickers"].split(",")})
+                else:
+                    self.assertEqual(result, MOCK_DATA)
+
+    async def test_unknown_tool(self):
+        result = await tools.call_tool("no_such_tool")
+        self.assertEqual(result["error"]["type"], "UnknownTool")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+from cache import FileCache, is_success
+
+ENDPOINT = "stock/XNYS/income/statement/yearly"
+PARAMS = [("ticker", "AAPL"), ("end_date", "2020-12-31")]
+RESPONSE = {"code": 200, "data": [{"ticker": "AAPL", "revenue": 1}]}
+
+class FileCacheTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cache = FileCache(self.tmp_dir.name)
+
+    async def test_round_trip(self):
+        await self.cache.set(ENDPOINT, PARAMS, 60, RESPONSE)
+        self.assertEqual(await self.cache.get(ENDPOINT, PARAMS), RESPONSE)
+        # 参数顺序不影响缓存键
+        self.assertEqual(await self.cache.get(ENDPOINT, list(reversed(PARAMS))), RESPONSE)
+        self.assertIsNone(await self.cache.get(ENDPOINT, [("ticker", "MSFT")]))
+
+    async def test_expired_entry(self):
+        await self.cache.set(ENDPOINT, PARAMS, -1, RESPONSE)
+        self.assertIsNone(await self.cache.get(ENDPOINT, PARAMS))
+
+    async def test_malformed_entry(self):
+        path = self.cache._path(ENDPOINT, PARAMS)
+        os.makedirs(os.path.dirname(path))
+        for content in (b"{not json", b"[]", b'{"data": 1}'):
+            with self.subTest(content=content):
+                with open(path, "wb") as f:
+                    f.write(content)
+                self.assertIsNone(await self.cache.get(ENDPOINT, PARAMS))
+
+    async def test_get_or_fetch(self):
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            return RESPONSE
+
+        self.assertEqual(await self.cache.get_or_fetch(ENDPOINT, PARAMS, 60, fetch), RESPONSE)
+        self.assertEqual(await self.cache.get_or_fetch(ENDPOINT, PARAMS, 60, fetch), RESPONSE)
+        self.assertEqual(len(calls), 1)
+
+    async def test_errors_are_not_cached(self):
+        for response in ({"error": {"type": "HTTPStatusError", "message": "500"}},
+                         {"code": 429, "data": None}, {"code": 500, "data": []}):
+            with self.subTest(response=response):
+                async def fetch():
+                    return response
+
+                self.assertEqual(await self.cache.get_or_fetch(ENDPOINT, PARAMS, 60, fetch), response)
+                self.assertIsNone(await self.cache.get(ENDPOINT, PARAMS))
+
+class IsSuccessTest(unittest.TestCase):
+    def test_is_success(self):
+        self.assertTrue(is_success({"code": 200, "data": []}))
+        self.assertTrue(is_success({"data": {"ticker": "AAPL"}}))
+        self.assertFalse(is_success({"code": 200, "data": None}))
+        self.assertFalse(is_success({"code": 401, "data": []}))
+        self.assertFalse(is_success({"error": {"type": "ApiError"}}))
+        self.assertFalse(is_success("error"))
+
+if __name__ == "__main__":
+    unittest.main()
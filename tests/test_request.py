@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+import tools
+from cache import FileCache
+
+class RequestTestCase(unittest.IsolatedAsyncioTestCase):
+    """通过注入的 httpx 客户端（MockTransport）向 make_fin_request 提供响应，记录实际发出的请求"""
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"code": 200, "data": [{"ticker": "AAPL"}]})
+
+    async def asyncSetUp(self):
+        self.requests = []
+
+        async def handler(request):
+            self.requests.append(request)
+            await asyncio.sleep(0)
+            return self.handle(request)
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_cache = tools._file_cache
+        tools._file_cache = FileCache(self.tmp_dir.name)
+        tools._cache.clear()
+        tools._cache_hits = tools._cache_misses = tools._inflight_joins = 0
+        tools._consecutive_failures = 0
+        tools._circuit_open_until = 0.0
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url=tools.FIN_API_URL)
+        self.token = tools.http_client_var.set(self.client)
+
+    async def asyncTearDown(self):
+        tools.http_client_var.reset(self.token)
+        await self.client.aclose()
+        tools._file_cache = self.file_cache
+        tools._cache.clear()
+        tools._consecutive_failures = 0
+        tools._circuit_open_until = 0.0
+        self.tmp_dir.cleanup()
+
+class SingleFlightTest(RequestTestCase):
+    async def test_concurrent_callers_share_one_request(self):
+        results = await asyncio.gather(*(tools.make_fin_request("stock/XNYS/list", {"fmt": "json"}) for _ in range(5)))
+        self.assertEqual(len(self.requests), 1)
+        self.assertTrue(all(result == results[0] for result in results))
+        stats = tools.cache_stats()
+        self.assertEqual((stats["misses"], stats["joined"], stats["hits"]), (1, 4, 0))
+
+    async def test_callers_get_independent_copies(self):
+        first, second = await asyncio.gather(
+            tools.make_fin_request("stock/XNYS/list"), tools.make_fin_request("stock/XNYS/list"))
+        first["data"].clear()
+        self.assertEqual(second["data"], [{"ticker": "AAPL"}])
+        cached = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(cached["data"], [{"ticker": "AAPL"}])
+        self.assertEqual(tools.cache_stats()["hits"], 1)
+
+class ResponseCacheTest(RequestTestCase):
+    async def test_hit_within_ttl(self):
+        await tools.make_fin_request("stock/XNYS/list", {"fmt": "json"})
+        await tools.make_fin_request("stock/XNYS/list", [("fmt", "json"), ("token", "x")])
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(tools.cache_stats()["hits"], 1)
+
+    async def test_expired_entry_is_refetched(self):
+        await tools.make_fin_request("stock/XNYS/daily/realtime", {"ticker": "AAPL"})
+        key = next(iter(tools._cache))
+        self.assertLessEqual(tools._cache[key][0] - time.monotonic(), tools.REALTIME_CACHE_TTL)
+        tools._cache[key] = (time.monotonic() - 1, tools._cache[key][1])
+        await tools.make_fin_request("stock/XNYS/daily/realtime", {"ticker": "AAPL"})
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(tools.cache_stats()["misses"], 2)
+
+    async def test_evicts_least_recently_used(self):
+        with mock.patch.object(tools, "CACHE_MAX_ENTRIES", 2):
+            await tools.make_fin_request("stock/XNYS/list", {"ticker": "A"})
+            await tools.make_fin_request("stock/XNYS/list", {"ticker": "B"})
+            await tools.make_fin_request("stock/XNYS/list", {"ticker": "A"})
+            await tools.make_fin_request("stock/XNYS/list", {"ticker": "C"})
+            self.assertEqual(len(tools._cache), 2)
+            await tools.make_fin_request("stock/XNYS/list", {"ticker": "A"})
+            await tools.make_fin_request("stock/XNYS/list", {"ticker": "B"})
+        self.assertEqual([dict(request.url.params)["ticker"] for request in self.requests], ["A", "B", "C", "B"])
+
+    async def test_error_response_is_not_cached(self):
+        self.handle = lambda request: httpx.Response(200, json={"code": 401, "msg": "invalid token", "data": None})
+        await tools.make_fin_request("stock/XNYS/list")
+        await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(len(tools._cache), 0)
+
+    async def test_closed_statement_goes_to_file_cache(self):
+        endpoint = "stock/XNYS/income/statement/yearly"
+        params = [("ticker", "AAPL"), ("end_date", "2020-12-31")]
+        await tools.make_fin_request(endpoint, params)
+        self.assertIsNotNone(await tools._file_cache.get(endpoint, params))
+        tools._cache.clear()
+        result = await tools.make_fin_request(endpoint, params)
+        self.assertEqual(result["data"], [{"ticker": "AAPL"}])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_open_statement_skips_file_cache(self):
+        endpoint = "stock/XNYS/income/statement/yearly"
+        await tools.make_fin_request(endpoint, [("ticker", "AAPL")])
+        self.assertIsNone(await tools._file_cache.get(endpoint, [("ticker", "AAPL")]))
+
+class RetryTest(RequestTestCase):
+    """按 statuses 依次返回状态码，用完后返回 200"""
+
+    def handle(self, request):
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status, json={"code": 200, "data": [{"ticker": "AAPL"}]})
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.statuses = []
+        patcher = mock.patch.object(tools, "_backoff", lambda retry_state: 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_retries_server_error(self):
+        self.statuses = [500, 503]
+        result = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(result["data"], [{"ticker": "AAPL"}])
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_client_error_is_not_retried(self):
+        self.statuses = [404]
+        result = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(result["error"]["type"], "HTTPStatusError")
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(tools._consecutive_failures, 0)
+
+    async def test_gives_up_after_max_attempts(self):
+        self.statuses = [500] * tools.MAX_RETRY_ATTEMPTS
+        result = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(result["error"]["type"], "HTTPStatusError")
+        self.assertEqual(len(self.requests), tools.MAX_RETRY_ATTEMPTS)
+        # 失败的响应不缓存，下次调用重新请求
+        result = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(result["data"], [{"ticker": "AAPL"}])
+        self.assertEqual(tools._consecutive_failures, 0)
+
+    async def test_circuit_opens_after_repeated_failures(self):
+        self.statuses = [500] * (tools.MAX_RETRY_ATTEMPTS * tools.CIRCUIT_FAILURE_THRESHOLD)
+        for i in range(tools.CIRCUIT_FAILURE_THRESHOLD):
+            result = await tools.make_fin_request("stock/XNYS/list", {"ticker": str(i)})
+            self.assertEqual(result["error"]["type"], "HTTPStatusError")
+        sent = len(self.requests)
+        result = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(result["error"]["type"], "CircuitOpen")
+        self.assertEqual(len(self.requests), sent)
+        # 冷却期结束后恢复请求
+        tools._circuit_open_until = 0.0
+        result = await tools.make_fin_request("stock/XNYS/list")
+        self.assertEqual(result["data"], [{"ticker": "AAPL"}])
+
+class CheckCodesTest(RequestTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.addCleanup(tools._EXCHANGES.clear)
+        self.addCleanup(tools._FOREX_TICKERS.clear)
+
+    async def test_empty_set_skips_validation(self):
+        result = await tools.get_stock_monthly_realtime_data("XNYS", "AAPL")
+        self.assertEqual(result, [{"ticker": "AAPL"}])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_unknown_code_fails_without_request(self):
+        tools._EXCHANGES.update({"XNYS", "XSHG"})
+        result = await tools.get_stock_monthly_realtime_data("XXXX", "AAPL")
+        self.assertEqual(result["error"]["type"], "InvalidCode")
+        self.assertIn("XXXX", result["error"]["message"])
+        self.assertEqual(self.requests, [])
+
+    async def test_known_code_is_case_insensitive(self):
+        tools._EXCHANGES.add("XNYS")
+        result = await tools.get_stock_monthly_realtime_data(exchange_code="xnys", ticker="AAPL")
+        self.assertEqual(result, [{"ticker": "AAPL"}])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_comma_separated_codes(self):
+        tools._FOREX_TICKERS.update({"USDCNY", "EURUSD"})
+        result = await tools.get_forex_realtime("USDCNY, EURUSD")
+        self.assertEqual(result, [{"ticker": "AAPL"}])
+        result = await tools.get_forex_realtime("USDCNY,USDJPY")
+        self.assertEqual(result["error"], {"type": "InvalidCode", "message": "未知的ticker: USDJPY"})
+        self.assertEqual(len(self.requests), 1)
+
+if __name__ == "__main__":
+    unittest.main()
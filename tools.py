@@ -1,10 +1,22 @@
 #!/usr/bin/env python3
 import asyncio
+import functools
+import inspect
 import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Union
+import time
+import types
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+from zoneinfo import ZoneInfo
 import httpx
+import orjson
+from aiolimiter import AsyncLimiter
+from tenacity import AsyncRetrying, RetryCallState, retry_if_exception, stop_after_attempt, wait_random_exponential
+from cache import FileCache, is_success
 
 # 配置日志
 logger = logging.getLogger("fin-tools")
@@ -12,27 +24,286 @@ logger = logging.getLogger("fin-tools")
 # 沧海 API 配置
 FIN_API_TOKEN = os.environ.get("FIN_API_TOKEN")
 
-FIN_API_BASE = "https://api.tsanghi.com/fin"
-
-# 辅助函数
-async def make_fin_request(endpoint: str, params: dict = None) -> dict:
-    """向沧海 API 发送请求并处理响应"""
-    url = f"https://tsanghi.com/api/fin/{endpoint}"
+# 北京时区
+_BJ_TZ = ZoneInfo("Asia/Shanghai")
+
+# 共享客户端的 base_url，各函数只传入相对的接口路径
+FIN_API_URL = "https://tsanghi.com/api/fin/"
+
+# 可由宿主注入的 HTTP 客户端（需自行设置 base_url 和 token 默认参数），未设置时使用模块内共享的客户端
+http_client_var: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("http_client", default=None)
+
+# 模块内共享的 HTTP 客户端：复用 TCP/TLS 连接并启用 HTTP/2 多路复用，首次请求时创建
+_client: Optional[httpx.AsyncClient] = None
+_client_lock = asyncio.Lock()
+
+async def _get_client() -> httpx.AsyncClient:
+    """获取共享的 HTTP 客户端，不存在时创建"""
+    global _client
+    client = http_client_var.get()
+    if client is not None:
+        return client
+    if _client is None:
+        async with _client_lock:
+            if _client is None:
+                _client = httpx.AsyncClient(
+                    base_url=FIN_API_URL,
+                    params={"token": FIN_API_TOKEN},
+                    # 显式声明支持 gzip/brotli 压缩，大体量的 JSON 响应传输量可减少数倍
+                    headers={"Accept-Encoding": "gzip, br", "User-Agent": "finmcp/1.0"},
+                    http2=True,
+                    timeout=30.0,
+                    limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+                )
+    return _client
+
+async def _close_client() -> None:
+    """关闭共享的 HTTP 客户端，在服务器关闭时调用"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+# 响应缓存：按接口路径和参数缓存成功的响应，超过容量时淘汰最久未使用的条目
+# 缓存时间按数据的更新频率划分
+CACHE_MAX_ENTRIES = 4096
+# 实时行情变化快，只缓存半分钟，合并短时间内的重复查询
+REALTIME_CACHE_TTL = 30
+# 国家、交易所、币种、代码列表、公司信息等基础信息很少变化
+REFERENCE_CACHE_TTL = 30 * 24 * 3600
+# 季度/年度财务报表只在定期报告发布时更新；只有 end_date 已过去的查询结果不会再变，不限终止日期的查询按其他历史数据缓存
+STATEMENT_CACHE_TTL = 90 * 24 * 3600
+# 分红、送股、配股等其他历史数据，不限终止日期的查询会包含新发生的公司行动，只短时间缓存
+HISTORICAL_CACHE_TTL = 3600
+
+# 基础信息接口：固定路径，以及 stock/{交易所代码}/...、index/{国家代码}/... 下的清单和公司信息
+_REFERENCE_ENDPOINTS = frozenset({"country", "currency", "forex/list", "stock/country", "stock/exchange", "index/country"})
+_REFERENCE_ENDPOINT_SUFFIXES = frozenset({"list", "constituent", "company/info", "company/officer"})
+_STATEMENT_ENDPOINT_SUFFIXES = ("quarterly", "yearly")
+
+# 缓存和进行中的请求保存 orjson 序列化后的响应，每个调用方各自反序列化得到独立的对象，修改返回值不会影响其他调用方
+_cache: OrderedDict[tuple, tuple[float, bytes]] = OrderedDict()
+_cache_hits = 0
+_cache_misses = 0
+_inflight_joins = 0
+
+def _is_past_date(value: Any) -> bool:
+    """判断 yyyy-mm-dd 格式的日期是否早于今天（北京时间），无法解析时视为否"""
+    try:
+        return date.fromisoformat(str(value)) < datetime.now(_BJ_TZ).date()
+    except ValueError:
+        return False
+
+def _cache_ttl(endpoint: str, params: List[tuple]) -> float:
+    """根据接口路径和参数决定缓存时间（秒）"""
+    if endpoint.endswith("realtime"):
+        return REALTIME_CACHE_TTL
+    if endpoint in _REFERENCE_ENDPOINTS:
+        return REFERENCE_CACHE_TTL
+    family, _, rest = endpoint.partition("/")
+    if family in ("stock", "index") and rest.partition("/")[2] in _REFERENCE_ENDPOINT_SUFFIXES:
+        return REFERENCE_CACHE_TTL
+    if endpoint.endswith(_STATEMENT_ENDPOINT_SUFFIXES):
+        end_date = next((v for k, v in params if k == "end_date"), None)
+        if end_date is not None and _is_past_date(end_date):
+            return STATEMENT_CACHE_TTL
+    return HISTORICAL_CACHE_TTL
+
+def cache_stats() -> Dict[str, Any]:
+    """查看 API 响应缓存的命中情况（由 server.py 的 /debug/cache 提供，不注册为工具）
     
-    if params is None:
-        params = {}
+    返回:
+        包含命中次数、未命中次数、合并到进行中请求的次数、命中率和当前缓存条目数的字典
+    """
+    total = _cache_hits + _cache_misses + _inflight_joins
+    return {
+        "hits": _cache_hits,
+        "misses": _cache_misses,
+        "joined": _inflight_joins,
+        "hit_rate": _cache_hits / total if total else 0.0,
+        "size": len(_cache),
+    }
+
+# 客户端限流：按接口类别（路径的第一段）使用令牌桶，每秒请求数不超过下列上限，未列出的类别不限流
+RATE_LIMITS = {"stock": 20, "index": 10, "forex": 10}
+LIMITERS = {family: AsyncLimiter(max_rate=rate, time_period=1) for family, rate in RATE_LIMITS.items()}
+
+# 重试与熔断：网络错误、429 和 5xx 按指数退避重试（429 带有 Retry-After 时按其等待）；
+# 连续失败过多时在冷却期内直接返回错误
+MAX_RETRY_ATTEMPTS = 3
+MAX_RETRY_AFTER = 10
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 30
+
+_consecutive_failures = 0
+_circuit_open_until = 0.0
+
+def _is_retryable(exc: BaseException) -> bool:
+    """判断请求异常是否值得重试（其余 4xx 为调用方参数问题，重试无意义）"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+_backoff = wait_random_exponential(multiplier=0.1, max=2)
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """计算下次重试前的等待时间：429 响应带有 Retry-After 秒数时按其等待（不超过 MAX_RETRY_AFTER），否则指数退避"""
+    exc = retry_state.outcome.exception()
+    retry_after = None
+    if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+        retry_after = exc.response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_AFTER)
+    return _backoff(retry_state)
+
+async def _stream_request(client: httpx.AsyncClient, endpoint: str, params: List[tuple]) -> Any:
+    """以流式方式读取响应并解析 JSON
+    
+    分块追加到同一个 bytearray 中，避免 response.content 先收集分块列表再整体拼接，
+    大响应（历史报表、指数成分等）的内存峰值约减半
+    """
+    async with client.stream("GET", endpoint, params=params, timeout=30.0) as response:
+        response.raise_for_status()
+        buf = bytearray()
+        async for chunk in response.aiter_bytes():
+            buf += chunk
+    return orjson.loads(buf)
+
+# 正在进行中的请求：相同接口和参数的并发调用共享同一个请求任务
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+# 财务报表等按季度/年度更新的数据同时缓存到磁盘，进程重启后仍然有效
+_file_cache = FileCache()
+
+def error_dict(e: Union[BaseException, str], message: Optional[str] = None, **details) -> dict:
+    """构造结构化错误字典 {"error": {"type": ..., "message": ...}}，调用方可按 type 区分错误类型而无需解析错误文本
     
-    # 添加token到参数中
-    params["token"] = FIN_API_TOKEN
+    传入异常时类型取异常类名、信息取 str(e)；不是由异常引起的错误传入类型名和信息，例如 error_dict("InvalidCode", "未知的ticker: X")。
+    """
+    if isinstance(e, BaseException):
+        return {"error": {"type": type(e).__name__, "message": str(e), **details}}
+    return {"error": {"type": e, "message": message, **details}}
+
+async def _request(endpoint: str, params: List[tuple]) -> dict:
+    """发送请求（含重试和熔断），出错时返回错误字典"""
+    global _consecutive_failures, _circuit_open_until
+    if time.monotonic() < _circuit_open_until:
+        return error_dict("CircuitOpen", "沧海 API 暂时不可用，请稍后重试")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
+        client = await _get_client()
+        limiter = LIMITERS.get(endpoint.partition("/")[0])
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(MAX_RETRY_ATTEMPTS),
+            wait=_retry_wait,
+            retry=retry_if_exception(_is_retryable),
+            reraise=True,
+        ):
+            with attempt:
+                if limiter is not None:
+                    await limiter.acquire()
+                result = await _stream_request(client, endpoint, params)
     except Exception as e:
-        logger.error(f"API 请求错误: {str(e)}")
-        return {"error": str(e)}
+        if _is_retryable(e):
+            _consecutive_failures += 1
+            if _consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                _circuit_open_until = time.monotonic() + CIRCUIT_COOLDOWN
+                logger.warning("沧海 API 连续失败 %s 次，%s 秒内暂停请求", _consecutive_failures, CIRCUIT_COOLDOWN)
+        logger.error("API 请求错误: %s", e)
+        return error_dict(e)
+    _consecutive_failures = 0
+    return result
+
+async def _fetch(endpoint: str, params: List[tuple], key: tuple) -> bytes:
+    """获取响应（财务报表先查磁盘缓存），返回序列化后的响应，成功的响应写入内存缓存"""
+    ttl = _cache_ttl(endpoint, params)
+    if ttl == STATEMENT_CACHE_TTL:
+        result = await _file_cache.get_or_fetch(endpoint, params, ttl, lambda: _request(endpoint, params))
+    else:
+        result = await _request(endpoint, params)
+    
+    payload = orjson.dumps(result)
+    if is_success(result):
+        _cache[key] = (time.monotonic() + ttl, payload)
+        _cache.move_to_end(key)
+        if len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return payload
+
+# 辅助函数
+async def make_fin_request(endpoint: str, params: Union[dict, List[tuple], None] = None) -> dict:
+    """向沧海 API 发送请求并处理响应，成功的响应按接口类型缓存一段时间，相同的并发请求只发送一次"""
+    global _cache_hits, _cache_misses, _inflight_joins
+    
+    # 参数可以是字典或 (键, 值) 元组列表，统一整理为新的元组列表并移除值为None的参数；
+    # token 由客户端的默认参数统一附加，忽略调用方传入的值
+    items = params.items() if isinstance(params, dict) else params or ()
+    params = [(k, v) for k, v in items if v is not None and k != "token"]
+    
+    key = (endpoint, frozenset(params))
+    cached = _cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        _cache.move_to_end(key)
+        _cache_hits += 1
+        return orjson.loads(cached[1])
+    
+    task = _inflight.get(key)
+    if task is None:
+        _cache_misses += 1
+        task = asyncio.ensure_future(_fetch(endpoint, params, key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        _inflight_joins += 1
+    # shield：某个调用方被取消时不影响共享同一请求的其他调用方
+    return orjson.loads(await asyncio.shield(task))
+
+def _unwrap(response: dict, expect: str = "any") -> Any:
+    """从 API 响应中取出 data 字段
+    
+    请求出错、缺少 data 字段，或 expect="dict" 时 data 不是字典，均返回错误字典
+    """
+    if "error" in response:
+        error = response["error"]
+        return {"error": error} if isinstance(error, dict) else error_dict("ApiError", str(error))
+    data = response.get("data")
+    if data is None or (expect == "dict" and not isinstance(data, dict)):
+        logger.error("响应中缺少有效数据: %s", response)
+        return error_dict("InvalidResponse", "响应中缺少有效数据", response=response)
+    return data
+
+# 已知的有效代码，在首次成功调用不带筛选条件的列表接口时填充（统一转为大写）
+_COUNTRIES: set[str] = set()
+_EXCHANGES: set[str] = set()
+_FOREX_TICKERS: set[str] = set()
+
+def _remember_codes(codes: set[str], data: Any, field: str) -> None:
+    """从列表接口返回的数据中记录有效代码"""
+    if isinstance(data, list):
+        codes.update(str(item[field]).upper() for item in data if isinstance(item, dict) and item.get(field))
+
+def _check_codes(**fields: set[str]):
+    """在发送请求前按已知代码集合校验参数，代码未知时直接返回错误，避免一次无效的网络往返
+    
+    集合为空（列表接口尚未调用过）时不做校验。参数值可以是以半角逗号分隔的多个代码。
+    """
+    def decorator(func):
+        sig = inspect.signature(func)
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            arguments = sig.bind(*args, **kwargs).arguments
+            for name, codes in fields.items():
+                value = arguments.get(name)
+                if not codes or not value:
+                    continue
+                for code in str(value).split(","):
+                    if code.strip().upper() not in codes:
+                        return error_dict("InvalidCode", f"未知的{name}: {code.strip()}")
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
 
 async def restart_server() -> str:
     """重启 MCP 服务器
@@ -46,7 +317,7 @@ async def restart_server() -> str:
         
         return "服务器重启请求已接收，服务器将在处理完当前请求后重启"
     except Exception as e:
-        logger.error(f"重启服务器错误: {str(e)}")
+        logger.error("重启服务器错误: %s", e)
         return f"重启服务器时发生错误: {str(e)}"
 
 async def get_beijing_time() -> Dict[str, Any]:
@@ -58,18 +329,14 @@ async def get_beijing_time() -> Dict[str, Any]:
         标准北京时间响应字典，格式为yyyy-MM-dd HH:mm:ss
     """
     try:
-        from datetime import datetime
-        import pytz
-        
         # 获取北京时区的当前时间
-        beijing_tz = pytz.timezone('Asia/Shanghai')
-        beijing_time = datetime.now(beijing_tz).strftime('%Y-%m-%d %H:%M:%S')
-        logger.info(f"使用系统时间作为备选: {beijing_time}")
+        beijing_time = datetime.now(_BJ_TZ).strftime('%Y-%m-%d %H:%M:%S')
+        logger.info("使用系统时间作为备选: %s", beijing_time)
         
         # 返回与API相同格式的响应
         return beijing_time
     except Exception as e:
-        logger.error(f"获取北京时间错误 {str(e)}")
+        logger.error("获取北京时间错误 %s", e)
         return f"获取时间出错: {str(e)}"
 
 '''
@@ -80,48 +347,7 @@ async def get_beijing_time() -> Dict[str, Any]:
 ##################################################
 '''
 
-
-async def get_historical_balance_sheet_annual(token: str, exchange_code: str, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None, limit: Optional[int] = None, fmt: Optional[str] = "json", columns: Optional[str] = None, order: Optional[int] = 0) -> Dict[str, Any]:
-    """获取股票的历史资产负债表（年度）
-    
-    必选参数：
-        token: API Token，登录后获取
-        exchange_code: 交易所代码，例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）
-        ticker: 股票代码，例如：600519（贵州茅台）、AAPL（苹果）
-    
-    可选参数：
-        start_date: 起始日期（报告期），格式“yyyy-mm-dd”，默认：最早日期
-        end_date: 终止日期（报告期），格式“yyyy-mm-dd”，默认：最新日期
-        limit: 输出数量，默认：全部
-        fmt: 输出格式，支持json和csv两种标准输出格式，默认：json
-        columns: 输出字段，支持自定义输出，多个字段以半角逗号分隔，默认：全部字段
-        order: 按日期排序，0：不排序，1：升序，2：降序，默认：0
-    
-    返回:
-        包含历史资产负债表数据的字典
-    """
-    endpoint = f"stock/{exchange_code}/balance/sheet/yearly"
-    params = {
-        "token": token,
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns,
-        "order": order
-    }
-    try:
-        response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"响应中缺少有效数据: {response}")
-            return {"error": "响应中缺少有效数据", "details": response}
-    except Exception as e:
-        logger.error(f"获取历史资产负债表（年度）失败: {str(e)}")
-        return {"error": str(e)}
-
+@_check_codes(country_code=_COUNTRIES)
 async def get_realtime_index_data(country_code: str, ticker: str, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
     """获取指数日内实时5分钟行情数据
 
@@ -139,78 +365,20 @@ async def get_realtime_index_data(country_code: str, ticker: str, limit: int = N
     """
     try:
         endpoint = f"index/{country_code}/5min/realtime"
-        params = {
-            "ticker": ticker
-        }
-        
-        # 添加可选参数
-        if limit is not None:
-            params["limit"] = limit
-        if fmt is not None:
-            params["fmt"] = fmt
-        if columns is not None:
-            params["columns"] = columns
-        
-        # 发送请求
-        response = await make_fin_request(endpoint, params)
-        
-        # 检查响应是否包含有效数据
-        if "data" in response and isinstance(response["data"], dict):
-            return response["data"]
-        else:
-            logger.warning("未收到有效的指数行情数据")
-            return {"error": "未收到有效数据"}
-    
-    except Exception as e:
-        logger.error(f"获取实时指数行情错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_forex_yearly_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇年线实时数据
-
-    获取指定外汇代码的年线实时行情数据。
-
-    参数:
-        ticker (str): 必选，外汇代码。例如：USDCNY（美元人民币）。
-        start_date (str): 可选，起始日期。格式“yyyy-mm-dd”。
-        end_date (str): 可选，终止日期。格式“yyyy-mm-dd”。
-        limit (int): 可选，输出数量，默认：1。
-        fmt (str): 可选，输出格式。支持json和csv两种标准输出格式，默认：json。
-        columns (str): 可选，输出字段。支持自定义输出，多个字段以半角逗号分隔。
-
-    返回:
-        外汇年线实时行情数据字典
-    """
-    try:
-        endpoint = f"forex/yearly/realtime"
         params = {
             "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
             "limit": limit,
             "fmt": fmt,
             "columns": columns
         }
-
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-
-        # 调用沧海API
+        
+        # 发送请求
         response = await make_fin_request(endpoint, params)
-
-        # 检查返回结果是否包含错误
-        if "error" in response:
-            logger.error(f"获取外汇年线实时数据失败: {response['error']}")
-            return {"error": response["error"]}
-
-        # 提取有效数据
-        data = response.get("data", {})
-
-        return data
-
+        return _unwrap(response, expect="dict")
+    
     except Exception as e:
-        logger.error(f"获取外汇年线实时数据出错: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取实时指数行情错误: %s", e)
+        return error_dict(e)
 
 async def get_country_info(country_code: Optional[str] = None, fmt: Optional[str] = 'json', columns: Optional[str] = None) -> Dict[str, Any]:
     """获取国家/地区信息
@@ -226,30 +394,23 @@ async def get_country_info(country_code: Optional[str] = None, fmt: Optional[str
         包含国家/地区信息的有效数据字典
     """
     try:
-        params = {}
-
-        # 必选参数已经在 make_fin_request 中处理
-        if country_code:
-            params["country_code"] = country_code
-        if fmt:
-            params["fmt"] = fmt
-        if columns:
-            params["columns"] = columns
+        params = {
+            "country_code": country_code,
+            "fmt": fmt,
+            "columns": columns
+        }
 
         response = await make_fin_request("country", params=params)
-
-        # 检查返回的响应是否包含错误
-        if "error" in response:
-            return {"error": response["error"]}
-
-        # 提取有效的 data 数据
-        data = response.get("data", {})
+        data = _unwrap(response)
+        if not country_code:
+            _remember_codes(_COUNTRIES, data, "country_code")
         return data
 
     except Exception as e:
-        logger.error(f"获取国家/地区信息错误 {str(e)}")
-        return {"error": f"获取国家/地区信息时发生错误: {str(e)}"}
+        logger.error("获取国家/地区信息错误 %s", e)
+        return error_dict(e)
 
+@_check_codes(exchange_code=_EXCHANGES)
 async def get_stock_monthly_realtime_data(exchange_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """
     获取股票实时月线数据
@@ -266,22 +427,16 @@ async def get_stock_monthly_realtime_data(exchange_code: str, ticker: str, fmt:
         包含股票实时月线数据的有效响应字典。
     """
     endpoint = f"stock/{exchange_code}/monthly/realtime"
-    params = {
-        "ticker": ticker,
-        "fmt": fmt
-    }
-    if columns:
-        params["columns"] = columns
+    params = [("ticker", ticker), ("fmt", fmt), ("columns", columns)]
 
     try:
         response = await make_fin_request(endpoint, params)
-        if "error" in response:
-            return {"error": response["error"]}
-        return response.get("data", {})
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取股票实时月线数据失败: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取股票实时月线数据失败: %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_realtime_monthly_index_data(country_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数的基本行情实时月线数据
 
@@ -300,29 +455,22 @@ async def get_realtime_monthly_index_data(country_code: str, ticker: str, fmt: s
         endpoint = f"index/{country_code}/monthly/realtime"
         params = {
             "ticker": ticker,
-            "fmt": fmt
+            "fmt": fmt,
+            "columns": columns
         }
-        if columns:
-            params["columns"] = columns
         
         response = await make_fin_request(endpoint, params)
-        if "error" in response:
-            return {"error": response["error"]}
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取实时月线行情数据错误 {str(e)}")
-        return {"error": f"获取数据出错: {str(e)}"}
+        logger.error("获取实时月线行情数据错误 %s", e)
+        return error_dict(e)
 
-async def get_forex_list(token: str, ticker: Optional[str] = None, fmt: Optional[str] = None, columns: Optional[str] = None) -> Dict[str, Any]:
+async def get_forex_list(ticker: Optional[str] = None, fmt: Optional[str] = None, columns: Optional[str] = None) -> Dict[str, Any]:
     """获取外汇清单信息
     
     获取外汇的基本信息列表，支持按需筛选和自定义输出。
     
     参数:
-        token (str): 必选。API Token，用于身份验证。
         ticker (Optional[str]): 可选。外汇代码，例如：USDCNY（美元/人民币）。支持多只代码，以半角逗号分隔，最多100只。
         fmt (Optional[str]): 可选。输出格式，支持json和csv，默认为json。
         columns (Optional[str]): 可选。自定义输出字段，多个字段以半角逗号分隔。
@@ -332,113 +480,29 @@ async def get_forex_list(token: str, ticker: Optional[str] = None, fmt: Optional
     """
     try:
         # 构造请求参数
-        params = {"token": token}
-        if ticker is not None:
-            params["ticker"] = ticker
-        if fmt is not None:
-            params["fmt"] = fmt
-        if columns is not None:
-            params["columns"] = columns
-        
-        # 发送请求并获取响应
-        response = await make_fin_request("forex/list", params=params)
-        
-        # 检查响应是否包含有效数据
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"未找到有效数据: {response}")
-            return {"error": "未找到有效数据"}
-    except Exception as e:
-        logger.error(f"获取外汇清单错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_forex_15min_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇日内行情实时15分钟数据
-
-    获取指定外汇代码的日内行情实时15分钟数据，支持多种可选参数进行筛选和格式化输出。
-
-    参数:
-        ticker (str): 必选，外汇代码。例如：USDCNY（美元人民币）。
-        start_date (str): 可选，起始日期。格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认：最早日期。
-        end_date (str): 可选，终止日期。格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认：最新日期。
-        limit (int): 可选，输出数量，默认：1。
-        fmt (str): 可选，输出格式。支持json和csv两种标准输出格式，默认：json。
-        columns (str): 可选，输出字段。支持自定义输出，多个字段以半角逗号分隔。
-
-    返回:
-        提取后的有效数据字典
-    """
-    try:
-        endpoint = f"forex/15min/realtime"
         params = {
             "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
             "fmt": fmt,
             "columns": columns
         }
         
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"API 响应中缺少 data 字段: {response}")
-            return {"error": "API 响应中缺少 data 字段", "details": response}
-    except Exception as e:
-        logger.error(f"获取外汇15分钟实时数据错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_forex_30min_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇日内行情实时30分钟数据
-    
-    获取指定外汇代码的日内行情实时30分钟数据，包括开盘价、最高价、最低价、收盘价等信息。
-    
-    参数:
-        ticker (str): 必选，外汇代码，例如：USDCNY（美元人民币）
-        start_date (str): 可选，起始日期，格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认：最早日期
-        end_date (str): 可选，终止日期，格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认：最新日期
-        limit (int): 可选，输出数量，默认：1
-        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式，默认：json
-        columns (str): 可选，输出字段，支持自定义输出，多个字段以半角逗号分隔
-    
-    返回:
-        外汇日内行情实时30分钟数据字典
-    """
-    endpoint = f"forex/30min/realtime"
-    params = {
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns
-    }
-    
-    # 移除值为None的参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
-    try:
-        response = await make_fin_request(endpoint, params)
-        if "data" in response and isinstance(response["data"], list) and len(response["data"]) > 0:
-            return response["data"][0]
-        else:
-            return {"error": "未能获取有效的数据"}
+        # 发送请求并获取响应
+        response = await make_fin_request("forex/list", params=params)
+        data = _unwrap(response)
+        if ticker is None:
+            _remember_codes(_FOREX_TICKERS, data, "ticker")
+        return data
     except Exception as e:
-        logger.error(f"获取外汇30分钟实时行情错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取外汇清单错误: %s", e)
+        return error_dict(e)
 
-async def get_stock_weekly_realtime_data(token: str, exchange_code: str, ticker: str, fmt: Optional[str] = None, columns: Optional[str] = None) -> Dict[str, Any]:
+@_check_codes(exchange_code=_EXCHANGES)
+async def get_stock_weekly_realtime_data(exchange_code: str, ticker: str, fmt: Optional[str] = None, columns: Optional[str] = None) -> Dict[str, Any]:
     """获取股票实时周线数据
 
     该函数用于获取指定股票在某交易所的实时周线行情数据。
 
     必选参数:
-        token (str): API Token，登录后获取。
         exchange_code (str): 交易所代码，例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
         ticker (str): 股票代码，例如：600519（贵州茅台）、AAPL（苹果）。
 
@@ -461,30 +525,20 @@ async def get_stock_weekly_realtime_data(token: str, exchange_code: str, ticker:
     try:
         endpoint = f"stock/{exchange_code}/weekly/realtime"
         params = {
-            "token": token,
-            "ticker": ticker
+            "ticker": ticker,
+            "fmt": fmt,
+            "columns": columns
         }
         
-        # 添加可选参数
-        if fmt:
-            params["fmt"] = fmt
-        if columns:
-            params["columns"] = columns
-        
         # 发送请求并获取响应
         response = await make_fin_request(endpoint, params=params)
-        
-        # 提取有效data字段返回
-        if isinstance(response, dict) and "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"无效的API响应: {response}")
-            return {"error": "未能获取有效的股票实时周线数据"}
+        return _unwrap(response)
     
     except Exception as e:
-        logger.error(f"获取股票实时周线数据出错: {str(e)}")
-        return {"error": f"获取数据失败: {str(e)}"}
+        logger.error("获取股票实时周线数据出错: %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_index_weekly_realtime(country_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数的实时周线数据
 
@@ -498,23 +552,14 @@ async def get_index_weekly_realtime(country_code: str, ticker: str, fmt: str = "
         实时周线数据的字典
     """
     endpoint = f"index/{country_code}/weekly/realtime"
-    params = {
-        "ticker": ticker,
-        "fmt": fmt,
-    }
-    if columns:
-        params["columns"] = columns
+    params = [("ticker", ticker), ("fmt", fmt), ("columns", columns)]
 
     try:
         response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"未找到有效数据: {response}")
-            return {"error": "未返回有效数据"}
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取指数实时周线错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取指数实时周线错误: %s", e)
+        return error_dict(e)
 
 async def search_financial_items(keywords: str, 
                                  type: Optional[str] = None, 
@@ -557,18 +602,13 @@ async def search_financial_items(keywords: str,
             "columns": columns
         }
         
-        # 移除值为None的参数
-        filtered_params = {k: v for k, v in params.items() if v is not None}
-        
-        response = await make_fin_request(endpoint, filtered_params)
-        if "data" in response:
-            return response["data"]
-        else:
-            return {"error": "Invalid response format", "details": response}
+        response = await make_fin_request(endpoint, params)
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"搜索金融项目错误 {str(e)}")
-        return {"error": f"搜索过程中发生错误: {str(e)}"}
+        logger.error("搜索金融项目错误 %s", e)
+        return error_dict(e)
 
+@_check_codes(ticker=_FOREX_TICKERS)
 async def get_forex_realtime(ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """
     获取外汇实时行情数据
@@ -583,158 +623,15 @@ async def get_forex_realtime(ticker: str, fmt: str = "json", columns: Optional[s
     """
     try:
         endpoint = "forex/realtime"
-        params = {
-            "ticker": ticker,
-            "fmt": fmt
-        }
-        
-        if columns:
-            params["columns"] = columns
+        params = [("ticker", ticker), ("fmt", fmt), ("columns", columns)]
         
         # 调用沧海API获取数据
         response = await make_fin_request(endpoint, params)
-        
-        # 检查返回结果是否包含"data"字段
-        if isinstance(response, dict) and "data" in response:
-            return response["data"]
-        else:
-            logger.error("未获取到有效的外汇实时行情数据")
-            return {"error": "未获取到有效的外汇实时行情数据"}
-    
-    except Exception as e:
-        logger.error(f"获取外汇实时行情错误: {str(e)}")
-        return {"error": f"获取外汇实时行情时发生错误: {str(e)}"}
-
-async def get_forex_weekly_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇实时周线数据
-    
-    根据指定的外汇代码和可选的时间范围，获取外汇的实时周线行情数据。
-    
-    参数:
-        ticker (str): 必选，外汇代码。例如：USDCNY（美元人民币）。
-        start_date (str): 可选，起始日期。格式“yyyy-mm-dd”。
-        end_date (str): 可选，终止日期。格式“yyyy-mm-dd”。
-        limit (int): 可选，输出数量，默认为1。
-        fmt (str): 可选，输出格式。支持json和csv两种标准输出格式，默认为json。
-        columns (str): 可选，输出字段。支持自定义输出，多个字段以半角逗号分隔。
-    
-    返回:
-        包含外汇实时周线数据的有效字典
-    """
-    try:
-        endpoint = "forex/weekly/realtime"
-        params = {
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
-            "fmt": fmt,
-            "columns": columns
-        }
-        
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        response = await make_fin_request(endpoint, params)
-        if "data" in response and isinstance(response["data"], dict):
-            return response["data"]
-        else:
-            logger.error("响应数据格式错误或缺少有效数据字段")
-            return {"error": "无效的响应数据格式"}
-    except Exception as e:
-        logger.error(f"获取外汇实时周线数据失败: {str(e)}")
-        return {"error": str(e)}
-
-async def get_forex_60min_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇日内行情的实时60分钟数据
-
-    必选参数:
-        ticker (str): 外汇代码，例如：USDCNY（美元人民币）
-
-    可选参数:
-        start_date (str): 起始日期，格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认：最早日期
-        end_date (str): 终止日期，格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认：最新日期
-        limit (int): 输出数量，默认：1
-        fmt (str): 输出格式，支持json和csv两种标准输出格式，默认：json
-        columns (str): 输出字段，支持自定义输出，多个字段以半角逗号分隔
-
-    返回:
-        包含实时60分钟外汇数据的有效数据字典
-    """
-    endpoint = f"forex/60min/realtime"
-    params = {
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns
-    }
-
-    # 移除值为None的可选参数
-    params = {k: v for k, v in params.items() if v is not None}
-
-    try:
-        response = await make_fin_request(endpoint, params)
-        if "error" in response:
-            return {"error": response["error"]}
-        return response.get("data", {})
-    except Exception as e:
-        logger.error(f"获取外汇60分钟实时行情错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_historical_dividends(
-    exchange_code: str,
-    ticker: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    limit: Optional[int] = None,
-    fmt: Optional[str] = None,
-    columns: Optional[str] = None,
-    order: Optional[int] = None
-) -> Dict[str, Any]:
-    """获取股票的历史分红数据
-    
-    根据交易所代码和股票代码查询历史分红信息，支持多种可选参数进行筛选。
+        return _unwrap(response)
     
-    必选参数:
-        exchange_code (str): 交易所代码，例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）
-        ticker (str): 股票代码，例如：600519（贵州茅台）、AAPL（苹果）
-    
-    可选参数:
-        start_date (str): 起始日期，格式“yyyy-mm-dd”，默认：最早日期
-        end_date (str): 终止日期，格式“yyyy-mm-dd”，默认：最新日期
-        limit (int): 输出数量
-        fmt (str): 输出格式，支持json和csv两种，默认：json
-        columns (str): 自定义输出字段，多个字段以半角逗号分隔
-        order (int): 按日期排序，0：不排序，1：升序，2：降序，默认：0
-    
-    返回:
-        历史分红数据字典，包含股票代码、日期、分红等信息
-    """
-    try:
-        endpoint = f"stock/{exchange_code}/dividend"
-        params = {
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
-            "fmt": fmt,
-            "columns": columns,
-            "order": order
-        }
-        
-        # 过滤掉值为None的可选参数
-        filtered_params = {k: v for k, v in params.items() if v is not None}
-        
-        response = await make_fin_request(endpoint, filtered_params)
-        
-        # 提取有效的data字段作为返回值
-        data = response.get("data", {})
-        return data
     except Exception as e:
-        logger.error(f"获取历史分红数据错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取外汇实时行情错误: %s", e)
+        return error_dict(e)
 
 async def get_index_constituents(country_code: str, ticker: str = None, constituent: str = None, fmt: str = "json", columns: str = None) -> Dict[str, Any]:
     """获取指数成分股信息
@@ -753,39 +650,32 @@ async def get_index_constituents(country_code: str, ticker: str = None, constitu
     """
     try:
         endpoint = f"index/{country_code}/constituent"
-        params = {}
 
         # 检查必选参数
         if not country_code:
-            return {"error": "缺少必选参数 country_code"}
+            return error_dict("MissingParameter", "缺少必选参数 country_code")
 
         # 检查ticker和constituent至少传一个
         if not ticker and not constituent:
-            return {"error": "ticker和constituent至少需要传递一个"}
+            return error_dict("MissingParameter", "ticker和constituent至少需要传递一个")
 
         # 构造请求参数
-        if ticker:
-            params["ticker"] = ticker
-        if constituent:
-            params["constituent"] = constituent
-        if fmt:
-            params["fmt"] = fmt
-        if columns:
-            params["columns"] = columns
+        params = {
+            "ticker": ticker,
+            "constituent": constituent,
+            "fmt": fmt,
+            "columns": columns
+        }
 
         # 调用API
         response = await make_fin_request(endpoint, params)
-
-        # 提取有效数据
-        if "data" in response:
-            return response["data"]
-        else:
-            return {"error": "未找到有效数据", "details": response}
+        return _unwrap(response)
 
     except Exception as e:
-        logger.error(f"获取指数成分股错误 {str(e)}")
-        return {"error": f"获取指数成分股时发生错误: {str(e)}"}
+        logger.error("获取指数成分股错误 %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_index_yearly_realtime(country_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数的基本行情实时年线数据
     
@@ -804,24 +694,17 @@ async def get_index_yearly_realtime(country_code: str, ticker: str, fmt: str = "
         endpoint = f"index/{country_code}/yearly/realtime"
         params = {
             "ticker": ticker,
-            "fmt": fmt
+            "fmt": fmt,
+            "columns": columns
         }
         
-        if columns:
-            params["columns"] = columns
-        
         response = await make_fin_request(endpoint, params)
-        
-        # 检查返回值是否包含有效数据
-        if "data" in response and isinstance(response["data"], dict):
-            return response["data"]
-        else:
-            logger.error(f"无效的API响应: {response}")
-            return {"error": "未能获取有效的指数年线数据"}
+        return _unwrap(response, expect="dict")
     except Exception as e:
-        logger.error(f"获取指数年线数据时发生错误: {str(e)}")
-        return {"error": f"获取指数年线数据失败: {str(e)}"}
+        logger.error("获取指数年线数据时发生错误: %s", e)
+        return error_dict(e)
 
+@_check_codes(exchange_code=_EXCHANGES)
 async def get_stock_yearly_realtime(exchange_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取股票实时年线数据
 
@@ -837,27 +720,17 @@ async def get_stock_yearly_realtime(exchange_code: str, ticker: str, fmt: str =
         包含股票实时年线数据的有效响应字典。
     """
     endpoint = f"stock/{exchange_code}/yearly/realtime"
-    params = {
-        "ticker": ticker,
-        "fmt": fmt
-    }
-    if columns:
-        params["columns"] = columns
+    params = [("ticker", ticker), ("fmt", fmt), ("columns", columns)]
 
     response = await make_fin_request(endpoint, params)
-    if "data" in response and isinstance(response["data"], dict):
-        return response["data"]
-    else:
-        logger.error(f"无效的API响应: {response}")
-        return {"error": "无法获取有效的股票实时年线数据"}
+    return _unwrap(response, expect="dict")
 
-async def get_stock_exchange_info(token: str, exchange_code: str = None, country_code: str = None, fmt: str = "json", columns: str = None) -> Dict[str, Any]:
+async def get_stock_exchange_info(exchange_code: str = None, country_code: str = None, fmt: str = "json", columns: str = None) -> Dict[str, Any]:
     """获取股票交易所信息
     
     获取指定条件下的股票交易所清单信息，支持按交易所代码、国家代码筛选。
     
     Args:
-        token (str): API Token，必选参数，登录后获取。
         exchange_code (str, optional): 交易所代码，采用ISO市场标识码MIC（Market identifier codes)，可选参数。例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
         country_code (str, optional): 国家/地区代码，可选参数。例如：CHN（中国）、USA（美国）。
         fmt (str, optional): 输出格式，支持json和csv两种标准输出格式，默认为json。
@@ -868,26 +741,21 @@ async def get_stock_exchange_info(token: str, exchange_code: str = None, country
     """
     endpoint = "stock/exchange"
     params = {
-        "token": token,
         "exchange_code": exchange_code,
         "country_code": country_code,
         "fmt": fmt,
         "columns": columns
     }
     
-    # 移除值为None的参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
     try:
         response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"未找到有效数据: {response}")
-            return {"error": "未找到有效数据", "details": response}
+        data = _unwrap(response)
+        if not exchange_code and not country_code:
+            _remember_codes(_EXCHANGES, data, "exchange_code")
+        return data
     except Exception as e:
-        logger.error(f"获取股票交易所信息失败: {str(e)}")
-        return {"error": f"获取股票交易所信息失败: {str(e)}"}
+        logger.error("获取股票交易所信息失败: %s", e)
+        return error_dict(e)
 
 async def get_index_list(country_code: str, ticker: Optional[str] = None, fmt: Optional[str] = None, columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数基本信息的指数清单
@@ -905,206 +773,52 @@ async def get_index_list(country_code: str, ticker: Optional[str] = None, fmt: O
     """
     try:
         endpoint = f"index/{country_code}/list"
-        params = {}
-        
-        if ticker:
-            params["ticker"] = ticker
-        if fmt:
-            params["fmt"] = fmt
-        if columns:
-            params["columns"] = columns
-        
-        response = await make_fin_request(endpoint, params)
-        
-        if "error" in response:
-            logger.error(f"获取指数清单失败: {response['error']}")
-            return {"error": response["error"]}
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
-    except Exception as e:
-        logger.error(f"获取指数清单时发生错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_forex_monthly_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇月线实时数据
-    
-    获取指定外汇代码的月线实时行情数据，支持多种可选参数以自定义输出。
-    
-    参数:
-        ticker (str): 必选，外汇代码，例如：USDCNY（美元人民币）。
-        start_date (str): 可选，起始日期，格式为“yyyy-mm-dd”。
-        end_date (str): 可选，终止日期，格式为“yyyy-mm-dd”。
-        limit (int): 可选，输出数量，默认为1。
-        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式，默认为json。
-        columns (str): 可选，输出字段，支持自定义输出，多个字段以半角逗号分隔。
-    
-    返回:
-        外汇月线实时行情数据字典
-    """
-    try:
-        endpoint = "forex/monthly/realtime"
         params = {
             "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
             "fmt": fmt,
             "columns": columns
         }
         
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
         response = await make_fin_request(endpoint, params)
-        if "error" in response:
-            logger.error(f"获取外汇月线实时数据失败: {response['error']}")
-            return {"error": response["error"]}
-        
-        return response.get("data", {})
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取外汇月线实时数据错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取指数清单时发生错误: %s", e)
+        return error_dict(e)
+
+async def get_country_list(country_code: str = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
+    """获取国家/地区清单
+
+    获取指数基本信息中的国家/地区清单，支持可选参数筛选。
 
-async def get_historical_eps_quarterly(token: str, exchange_code: str, ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None, order: int = None) -> Dict[str, Any]:
-    """获取股票历史每股收益（季度）
-    
-    获取指定股票的历史每股收益（季度）数据，支持多种筛选条件。
-    
     参数:
-        token (str): 必选。API Token。登录后获取。
-        exchange_code (str): 必选。交易所代码。例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
-        ticker (str): 必选。股票代码。例如：600519（贵州茅台）、AAPL（苹果）。
-        start_date (str): 可选。起始日期（报告期）。格式“yyyy-mm-dd”，默认：最早日期。
-        end_date (str): 可选。终止日期（报告期）。格式“yyyy-mm-dd”，默认：最新日期。
-        limit (int): 可选。输出数量。
-        fmt (str): 可选。输出格式。支持json和csv两种标准输出格式，默认：json。
-        columns (str): 可选。输出字段。支持自定义输出，多个字段以半角逗号分隔。
-        order (int): 可选。按日期排序。0：不排序，1：升序，2：降序，默认：0。
-    
+        country_code (str, 可选): 国家/地区代码，采用ISO国家/地区代码（Country Code）。
+        fmt (str, 可选): 输出格式，支持json和csv两种标准输出格式，默认为json。
+        columns (str, 可选): 输出字段，支持自定义输出，多个字段以半角逗号分隔。
+
     返回:
-        包含历史每股收益（季度）数据的字典。
+        dict: 包含国家/地区清单的有效数据字典
     """
     try:
-        endpoint = f"stock/{exchange_code}/earnings/quarterly"
+        endpoint = "index/country"
         params = {
-            "token": token,
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
+            "country_code": country_code,
             "fmt": fmt,
-            "columns": columns,
-            "order": order
+            "columns": columns
         }
-        
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        # 发送请求
-        response = await make_fin_request(endpoint, params)
-        
-        # 提取有效的data字段作为返回值
-        if isinstance(response, dict) and "data" in response:
-            return response["data"]
-        else:
-            logger.error("响应格式错误或缺少data字段")
-            return {"error": "无法获取有效数据"}
-    except Exception as e:
-        logger.error(f"获取历史每股收益（季度）错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_historical_allotment_data(token: str, exchange_code: str, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None, limit: Optional[int] = None, fmt: Optional[str] = None, columns: Optional[str] = None, order: Optional[int] = None) -> Dict[str, Any]:
-    """获取历史配股数据
-    
-    根据给定的交易所代码和股票代码，返回历史配股信息。
-
-    必选参数:
-        token (str): API Token。登录后获取。
-        exchange_code (str): 交易所代码。例如：XSHG（上交所）、XSHE（深交所）。
-        ticker (str): 股票代码。例如：600081（贵州茅台）。
-
-    可选参数:
-        start_date (str): 起始日期。格式“yyyy-mm-dd”，默认：最早日期。
-        end_date (str): 终止日期。格式“yyyy-mm-dd”，默认：最新日期。
-        limit (int): 输出数量。
-        fmt (str): 输出格式。支持json和csv两种标准输出格式，默认：json。
-        columns (str): 输出字段。多个字段以半角逗号分隔。
-        order (int): 按日期排序。0：不排序，1：升序，2：降序，默认：0。
-    
-    返回:
-        包含历史配股数据的有效响应数据字典
-    """
-    endpoint = f"stock/{exchange_code}/allot"
-    params = {
-        "token": token,
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns,
-        "order": order
-    }
-    
-    # 移除值为None的可选参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
-    try:
-        response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"未找到有效数据: {response}")
-            return {"error": "未找到有效数据"}
-    except Exception as e:
-        logger.error(f"获取历史配股数据错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_country_list(country_code: str = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取国家/地区清单
-
-    获取指数基本信息中的国家/地区清单，支持可选参数筛选。
-
-    参数:
-        country_code (str, 可选): 国家/地区代码，采用ISO国家/地区代码（Country Code）。
-        fmt (str, 可选): 输出格式，支持json和csv两种标准输出格式，默认为json。
-        columns (str, 可选): 输出字段，支持自定义输出，多个字段以半角逗号分隔。
-
-    返回:
-        dict: 包含国家/地区清单的有效数据字典
-    """
-    try:
-        endpoint = "index/country"
-        params = {}
-
-        if country_code is not None:
-            params["country_code"] = country_code
-        if fmt is not None:
-            params["fmt"] = fmt
-        if columns is not None:
-            params["columns"] = columns
 
         response = await make_fin_request(endpoint, params)
-
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error("响应中未包含有效数据")
-            return {"error": "响应中未包含有效数据"}
+        return _unwrap(response)
 
     except Exception as e:
-        logger.error(f"获取国家/地区清单错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取国家/地区清单错误: %s", e)
+        return error_dict(e)
 
-async def get_stock_list(token: str, exchange_code: str, ticker: Optional[str] = None, is_active: Optional[int] = 2, fmt: Optional[str] = "json", columns: Optional[str] = None) -> Dict[str, Any]:
+async def get_stock_list(exchange_code: str, ticker: Optional[str] = None, is_active: Optional[int] = 2, fmt: Optional[str] = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取股票清单信息
 
     根据交易所代码和其他可选参数，获取股票清单信息。
 
     参数:
-        token (str): 必选。API Token，登录后获取。
         exchange_code (str): 必选。交易所代码，例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
         ticker (Optional[str]): 可选。股票代码，支持多只股票以逗号分隔，最多100只，默认为None。
         is_active (Optional[int]): 可选。是否活跃。0：不活跃，1：活跃，2：所有，默认为2。
@@ -1117,69 +831,19 @@ async def get_stock_list(token: str, exchange_code: str, ticker: Optional[str] =
     try:
         endpoint = f"stock/{exchange_code}/list"
         params = {
-            "token": token,
             "ticker": ticker,
             "is_active": is_active,
             "fmt": fmt,
             "columns": columns
         }
         
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
         response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            return {"error": "未找到有效数据"}
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取股票清单错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_historical_cash_flow_annual(token: str, exchange_code: str, ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = "json", columns: str = None, order: int = 0) -> Dict[str, Any]:
-    """
-    获取股票历史现金流量表（年度）
-    
-    必选参数:
-        token (str): API Token。登录后获取。
-        exchange_code (str): 交易所代码。例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
-        ticker (str): 股票代码。例如：600519（贵州茅台）、AAPL（苹果）。
-    
-    可选参数:
-        start_date (str): 起始日期（报告期）。格式“yyyy-mm-dd”，默认：最早日期。
-        end_date (str): 终止日期（报告期）。格式“yyyy-mm-dd”，默认：最新日期。
-        limit (int): 输出数量。
-        fmt (str): 输出格式。支持json和csv两种标准输出格式，默认：json。
-        columns (str): 输出字段。支持自定义输出，多个字段以半角逗号分隔。
-        order (int): 按日期排序。0：不排序，1：升序，2：降序，默认：0。
-    
-    返回:
-        包含历史现金流量表数据的字典
-    """
-    endpoint = f"stock/{exchange_code}/cash/flow/yearly"
-    params = {
-        "token": token,
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns,
-        "order": order
-    }
-    
-    # 移除值为None的参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
-    try:
-        response = await make_fin_request(endpoint, params)
-        if "error" in response:
-            return {"error": response["error"]}
-        return response.get("data", {})
-    except Exception as e:
-        logger.error(f"获取历史现金流量表错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取股票清单错误: %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_realtime_index_data(country_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数实时行情数据
     
@@ -1198,109 +862,17 @@ async def get_realtime_index_data(country_code: str, ticker: str, fmt: str = "js
         endpoint = f"index/{country_code}/realtime"
         params = {
             "ticker": ticker,
-            "fmt": fmt
+            "fmt": fmt,
+            "columns": columns
         }
-        if columns:
-            params["columns"] = columns
         
         response = await make_fin_request(endpoint, params)
-        
-        # 检查返回结果是否包含有效的data字段
-        if isinstance(response, dict) and "data" in response:
-            return response["data"]
-        else:
-            logger.error("实时行情接口返回无效数据")
-            return {"error": "未能获取有效数据"}
-    except Exception as e:
-        logger.error(f"获取实时行情数据错误 {str(e)}")
-        return {"error": str(e)}
-
-async def get_historical_eps_annual(token: str, exchange_code: str, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None, limit: Optional[int] = None, fmt: Optional[str] = "json", columns: Optional[str] = None, order: Optional[int] = 0) -> Dict[str, Any]:
-    """获取股票历史每股收益（年度）
-
-    获取指定股票在特定时间段内的年度每股收益数据。
-
-    参数:
-        token (str): API Token，必选。
-        exchange_code (str): 交易所代码，如XSHG（上交所）、XSHE（深交所），必选。
-        ticker (str): 股票代码，如600519（贵州茅台），必选。
-        start_date (str, optional): 起始日期（报告期），格式“yyyy-mm-dd”，默认为最早日期。
-        end_date (str, optional): 终止日期（报告期），格式“yyyy-mm-dd”，默认为最新日期。
-        limit (int, optional): 输出数量，默认返回所有数据。
-        fmt (str, optional): 输出格式，支持json和csv，默认为json。
-        columns (str, optional): 自定义输出字段，多个字段以逗号分隔。
-        order (int, optional): 按日期排序，0：不排序，1：升序，2：降序，默认为0。
-
-    返回:
-        包含历史每股收益数据的字典，字段包括ticker（股票代码）、report_date（报告期）、eps（每股收益）、estimate_eps（预期每股收益）。
-    """
-    endpoint = f"stock/{exchange_code}/earnings/yearly"
-    params = {
-        "token": token,
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns,
-        "order": order
-    }
-    
-    # 移除值为None的参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
-    try:
-        response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"API 响应中缺少有效数据: {response}")
-            return {"error": "未能获取有效的历史每股收益数据"}
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取历史每股收益数据时发生错误: {str(e)}")
-        return {"error": str(e)}
-
-async def get_historical_income_statement(params: dict) -> dict:
-    """
-    获取股票历史利润表（季度）
-    
-    根据提供的参数，获取指定股票的历史利润表数据。
-    
-    参数:
-        params (dict): 包含请求参数的字典，字段如下：
-            - token (str): 必选，API Token。登录后获取。
-            - exchange_code (str): 必选，交易所代码。例如：XSHG（上交所）、XSHE（深交所）。
-            - ticker (str): 必选，股票代码。例如：600519（贵州茅台）、AAPL（苹果）。
-            - start_date (str): 可选，起始日期（报告期），格式“yyyy-mm-dd”，默认最早日期。
-            - end_date (str): 可选，终止日期（报告期），格式“yyyy-mm-dd”，默认最新日期。
-            - limit (int): 可选，输出数量。
-            - fmt (str): 可选，输出格式，默认json，支持csv。
-            - columns (str): 可选，自定义输出字段，多个字段以逗号分隔。
-            - order (int): 可选，按日期排序，默认0，0：不排序，1：升序，2：降序。
-    
-    返回:
-        dict: 响应中的有效数据部分，包含利润表的具体信息。
-    """
-    try:
-        # 检查必选参数是否存在
-        required_params = ["token", "exchange_code", "ticker"]
-        for param in required_params:
-            if param not in params:
-                return {"error": f"缺少必选参数: {param}"}
-        
-        # 构造请求路径
-        endpoint = f"stock/{params['exchange_code']}/income/statement/quarterly"
-        
-        # 发送请求并处理响应
-        response = await make_fin_request(endpoint, params)
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
-    except Exception as e:
-        logger.error(f"获取历史利润表错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取实时行情数据错误 %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_realtime_index_60min(country_code: str, ticker: str, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
     """获取指数日内行情实时60分钟数据
     
@@ -1324,66 +896,13 @@ async def get_realtime_index_60min(country_code: str, ticker: str, limit: int =
         "columns": columns
     }
     
-    # 移除值为None的参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
     try:
         response = await make_fin_request(endpoint, params)
-        
-        # 检查响应是否包含错误
-        if "error" in response:
-            logger.error(f"获取实时60分钟行情数据失败: {response['error']}")
-            return {"error": response['error']}
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
+        return _unwrap(response)
     
     except Exception as e:
-        logger.error(f"获取实时60分钟行情数据出错: {str(e)}")
-        return {"error": str(e)}
-
-async def get_forex_daily_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇实时日线数据
-    
-    获取指定外汇代码的实时日线数据，支持可选的日期范围、输出数量和格式。
-    
-    参数:
-        ticker (str): 必选，外汇代码，例如：USDCNY（美元人民币）。
-        start_date (str): 可选，起始日期，格式“yyyy-mm-dd”。
-        end_date (str): 可选，终止日期，格式“yyyy-mm-dd”。
-        limit (int): 可选，输出数量，默认为1。
-        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式，默认为json。
-        columns (str): 可选，输出字段，支持自定义输出，多个字段以半角逗号分隔。
-    
-    返回:
-        外汇实时日线数据字典
-    """
-    try:
-        endpoint = "forex/daily/realtime"
-        params = {
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
-            "fmt": fmt,
-            "columns": columns
-        }
-        
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        response = await make_fin_request(endpoint, params)
-        if "error" in response:
-            logger.error(f"获取外汇实时日线数据失败: {response['error']}")
-            return {"error": response["error"]}
-        
-        # 提取data字段作为返回值
-        data = response.get("data", {})
-        return data
-    except Exception as e:
-        logger.error(f"获取外汇实时日线数据错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取实时60分钟行情数据出错: %s", e)
+        return error_dict(e)
 
 async def get_country_list(country_code: str = None, fmt: str = "json", columns: str = None) -> Dict[str, Any]:
     """获取股票基本信息中的国家/地区清单
@@ -1400,77 +919,21 @@ async def get_country_list(country_code: str = None, fmt: str = "json", columns:
     """
     try:
         endpoint = "stock/country"
-        params = {}
-        
-        # 添加可选参数
-        if country_code:
-            params["country_code"] = country_code
-        if fmt:
-            params["fmt"] = fmt
-        if columns:
-            params["columns"] = columns
-        
-        # 发起请求
-        response = await make_fin_request(endpoint, params)
-        
-        # 检查错误并提取有效数据
-        if "error" in response:
-            return {"error": response["error"]}
-        
-        # 提取data字段作为返回值
-        data = response.get("data", {})
-        return data
-
-    except Exception as e:
-        logger.error(f"获取国家/地区清单出错: {str(e)}")
-        return {"error": f"获取国家/地区清单时发生错误: {str(e)}"}
-
-async def get_stock_split_history(token: str, exchange_code: str, ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = "json", columns: str = None, order: int = 0) -> Dict[str, Any]:
-    """获取股票历史送股信息
-    
-    获取指定股票在某段时间内的分红送股历史记录。
-    
-    参数:
-        token (str): 必选，API Token。登录后获取。
-        exchange_code (str): 必选，交易所代码。例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
-        ticker (str): 必选，股票代码。例如：600519（贵州茅台）、AAPL（苹果）。
-        start_date (str): 可选，起始日期。格式“yyyy-mm-dd”，默认：最早日期。
-        end_date (str): 可选，终止日期。格式“yyyy-mm-dd”，默认：最新日期。
-        limit (int): 可选，输出数量。
-        fmt (str): 可选，输出格式。支持json和csv两种标准输出格式，默认：json。
-        columns (str): 可选，输出字段。多个字段以半角逗号分隔。
-        order (int): 可选，按日期排序。0：不排序，1：升序，2：降序，默认：0。
-    
-    返回:
-        股票历史送股信息的data数据
-    """
-    try:
-        endpoint = f"stock/{exchange_code}/split"
         params = {
-            "token": token,
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
+            "country_code": country_code,
             "fmt": fmt,
-            "columns": columns,
-            "order": order
+            "columns": columns
         }
         
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
+        # 发起请求
         response = await make_fin_request(endpoint, params)
-        
-        if "error" in response:
-            logger.error(f"获取股票历史送股信息失败: {response['error']}")
-            return {"error": response["error"]}
-        
-        return response.get("data", {})
+        return _unwrap(response)
+
     except Exception as e:
-        logger.error(f"获取股票历史送股信息错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取国家/地区清单出错: %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_index_realtime_daily_data(country_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数实时日线数据
     
@@ -1496,19 +959,13 @@ async def get_index_realtime_daily_data(country_code: str, ticker: str, fmt: str
         
         # 调用辅助函数发送请求
         response = await make_fin_request(f"index/{country_code}/daily/realtime", params=params)
-        
-        # 检查响应是否包含错误信息
-        if "error" in response:
-            return {"error": response["error"]}
-        
-        # 提取有效数据并返回
-        data = response.get("data", {})
-        return data
+        return _unwrap(response)
 
     except Exception as e:
-        logger.error(f"获取指数实时日线数据失败: {str(e)}")
-        return {"error": f"获取指数实时日线数据失败: {str(e)}"}
+        logger.error("获取指数实时日线数据失败: %s", e)
+        return error_dict(e)
 
+@_check_codes(exchange_code=_EXCHANGES)
 async def get_stock_realtime_daily_data(exchange_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取股票实时日线数据
 
@@ -1527,31 +984,21 @@ async def get_stock_realtime_daily_data(exchange_code: str, ticker: str, fmt: st
         endpoint = f"stock/{exchange_code}/daily/realtime"
         params = {
             "ticker": ticker,
-            "fmt": fmt
+            "fmt": fmt,
+            "columns": columns
         }
         
-        if columns:
-            params["columns"] = columns
-        
         response = await make_fin_request(endpoint, params)
-        
-        # 检查是否有错误
-        if "error" in response:
-            return {"error": response["error"]}
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
+        return _unwrap(response)
     
     except Exception as e:
-        logger.error(f"获取股票实时日线数据错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取股票实时日线数据错误: %s", e)
+        return error_dict(e)
 
-async def get_stock_company_info(token: str, exchange_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
+async def get_stock_company_info(exchange_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取股票基本信息中的企业信息
 
     必选参数:
-        token (str): API Token。登录后获取。
         exchange_code (str): 交易所代码。例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
         ticker (str): 股票代码。例如：600519（贵州茅台）、AAPL（苹果）。
 
@@ -1565,29 +1012,19 @@ async def get_stock_company_info(token: str, exchange_code: str, ticker: str, fm
     try:
         endpoint = f"stock/{exchange_code}/company/info"
         params = {
-            "token": token,
             "ticker": ticker,
-            "fmt": fmt
+            "fmt": fmt,
+            "columns": columns
         }
         
-        if columns:
-            params["columns"] = columns
-        
         response = await make_fin_request(endpoint, params)
-        
-        # 检查响应是否包含错误
-        if "error" in response:
-            logger.error(f"获取股票企业信息失败: {response['error']}")
-            return {"error": response['error']}
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
+        return _unwrap(response)
     
     except Exception as e:
-        logger.error(f"获取股票企业信息出错: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取股票企业信息出错: %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_index_realtime_30min(country_code: str, ticker: str, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
     """获取指数日内行情的实时30分钟数据
     
@@ -1605,72 +1042,18 @@ async def get_index_realtime_30min(country_code: str, ticker: str, limit: int =
         endpoint = f"index/{country_code}/30min/realtime"
         params = {
             "ticker": ticker,
+            "limit": limit,
+            "fmt": fmt,
+            "columns": columns
         }
         
-        if limit is not None:
-            params["limit"] = limit
-        if fmt is not None:
-            params["fmt"] = fmt
-        if columns is not None:
-            params["columns"] = columns
-        
         response = await make_fin_request(endpoint, params)
-        
-        # 提取有效数据并返回
-        if "data" in response and isinstance(response["data"], dict):
-            return response["data"]
-        else:
-            logger.error("响应数据格式不正确")
-            return {"error": "无法获取有效的实时30分钟指数数据"}
+        return _unwrap(response, expect="dict")
     except Exception as e:
-        logger.error(f"获取实时30分钟指数数据失败: {str(e)}")
-        return {"error": f"请求失败: {str(e)}"}
-
-async def get_historical_income_statement(params: dict) -> dict:
-    """获取股票历史利润表（年度）
-    
-    该函数用于查询指定股票的历史年度利润表数据。
-    
-    参数:
-        params (dict): 请求参数字典，包含以下字段：
-            - token (str): 必选，API Token，登录后获取
-            - exchange_code (str): 必选，交易所代码，例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）
-            - ticker (str): 必选，股票代码，例如：600519（贵州茅台）、AAPL（苹果）
-            - start_date (str, optional): 可选，起始日期（报告期），格式“yyyy-mm-dd”，默认为最早日期
-            - end_date (str, optional): 可选，终止日期（报告期），格式“yyyy-mm-dd”，默认为最新日期
-            - limit (int, optional): 可选，输出数量
-            - fmt (str, optional): 可选，输出格式，支持json和csv，默认为json
-            - columns (str, optional): 可选，输出字段，多个字段以半角逗号分隔
-            - order (int, optional): 可选，按日期排序，0：不排序，1：升序，2：降序，默认为0
-    
-    返回:
-        dict: 包含历史利润表数据的字典
-    """
-    endpoint = "stock/{exchange_code}/income/statement/yearly"
-    required_params = ["token", "exchange_code", "ticker"]
-    
-    try:
-        # 检查必选参数是否存在
-        for param in required_params:
-            if param not in params:
-                return {"error": f"缺少必选参数: {param}"}
-        
-        # 构造请求URL
-        exchange_code = params.get("exchange_code")
-        url = FIN_API_BASE + endpoint.format(exchange_code=exchange_code)
-        
-        # 发送请求并处理响应
-        response = await make_fin_request(url, params=params)
-        
-        # 提取有效数据
-        if "data" in response:
-            return response["data"]
-        else:
-            return {"error": "未找到有效数据"}
-    except Exception as e:
-        logger.error(f"获取历史利润表错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取实时30分钟指数数据失败: %s", e)
+        return error_dict(e)
 
+@_check_codes(country_code=_COUNTRIES)
 async def get_index_realtime_15min(country_code: str, ticker: str, limit: Optional[int] = None, fmt: Optional[str] = None, columns: Optional[str] = None) -> Dict[str, Any]:
     """获取指数日内行情的实时15分钟数据
 
@@ -1694,71 +1077,12 @@ async def get_index_realtime_15min(country_code: str, ticker: str, limit: Option
         "columns": columns
     }
     
-    # 移除值为None的可选参数
-    params = {k: v for k, v in params.items() if v is not None}
-    
     try:
         response = await make_fin_request(endpoint, params)
-        if "data" in response and isinstance(response["data"], dict):
-            return response["data"]
-        else:
-            logger.error(f"无效的API响应结构: {response}")
-            return {"error": "未能获取有效数据"}
-    except Exception as e:
-        logger.error(f"获取指数实时15分钟行情失败: {str(e)}")
-        return {"error": str(e)}
-
-async def fetch_stock_balance_sheet_quarterly(
-    exchange_code: str,
-    ticker: str,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    limit: Optional[int] = None,
-    fmt: Optional[str] = None,
-    columns: Optional[str] = None,
-    order: Optional[int] = None
-) -> Dict[str, Any]:
-    """获取股票历史季度资产负债表数据
-    
-    必选参数:
-        exchange_code (str): 交易所代码，例如 XSHG（上交所）、XSHE（深交所）
-        ticker (str): 股票代码，例如 600519（贵州茅台）
-    
-    可选参数:
-        start_date (str): 起始日期（报告期），格式 yyyy-mm-dd，默认最早日期
-        end_date (str): 终止日期（报告期），格式 yyyy-mm-dd，默认最新日期
-        limit (int): 输出数量
-        fmt (str): 输出格式，支持 json 和 csv，默认 json
-        columns (str): 自定义输出字段，多个字段以逗号分隔
-        order (int): 按日期排序，0：不排序，1：升序，2：降序，默认 0
-    
-    返回:
-        包含股票季度资产负债表数据的字典
-    """
-    endpoint = f"stock/{exchange_code}/balance/sheet/quarterly"
-    params = {
-        "ticker": ticker,
-        "start_date": start_date,
-        "end_date": end_date,
-        "limit": limit,
-        "fmt": fmt,
-        "columns": columns,
-        "order": order
-    }
-    
-    # 移除值为None的参数
-    filtered_params = {k: v for k, v in params.items() if v is not None}
-    
-    try:
-        response = await make_fin_request(endpoint, filtered_params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"获取季度资产负债表失败: {response}")
-            return {"error": "未能获取有效数据"}
+        return _unwrap(response, expect="dict")
     except Exception as e:
-        logger.error(f"请求季度资产负债表错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取指数实时15分钟行情失败: %s", e)
+        return error_dict(e)
 
 async def get_company_officers(exchange_code: str, ticker: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
     """获取企业高管信息
@@ -1777,22 +1101,16 @@ async def get_company_officers(exchange_code: str, ticker: str, fmt: str = "json
     endpoint = f"stock/{exchange_code}/company/officer"
     params = {
         "ticker": ticker,
-        "fmt": fmt
+        "fmt": fmt,
+        "columns": columns
     }
     
-    if columns:
-        params["columns"] = columns
-    
     try:
         response = await make_fin_request(endpoint, params=params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"未找到有效数据: {response}")
-            return {"error": "未找到有效数据"}
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取企业高管信息错误: {str(e)}")
-        return {"error": str(e)}
+        logger.error("获取企业高管信息错误: %s", e)
+        return error_dict(e)
 
 async def get_currency_info(currency_code: str = None, fmt: str = "json", columns: str = None) -> Dict[str, Any]:
     """获取币种信息
@@ -1809,69 +1127,284 @@ async def get_currency_info(currency_code: str = None, fmt: str = "json", column
     """
     try:
         endpoint = "currency"
-        params = {}
-        
-        # 添加可选参数
-        if currency_code:
-            params["currency_code"] = currency_code
-        if fmt:
-            params["fmt"] = fmt
-        if columns:
-            params["columns"] = columns
+        params = {
+            "currency_code": currency_code,
+            "fmt": fmt,
+            "columns": columns
+        }
         
         # 发送请求并处理响应
         response = await make_fin_request(endpoint, params)
-        
-        # 检查是否有错误
-        if "error" in response:
-            logger.error(f"获取币种信息失败: {response['error']}")
-            return {"error": response["error"]}
-        
-        # 提取有效数据
-        data = response.get("data", {})
-        return data
+        return _unwrap(response)
     
     except Exception as e:
-        logger.error(f"获取币种信息时发生错误: {str(e)}")
-        return {"error": f"获取币种信息时发生错误: {str(e)}"}
+        logger.error("获取币种信息时发生错误: %s", e)
+        return error_dict(e)
 
-async def get_forex_5min_realtime(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
-    """获取外汇日内行情实时5分钟数据
-    
-    获取指定外汇代码的日内行情实时5分钟数据，支持自定义输出字段和时间范围筛选。
-    
-    Args:
-        ticker (str): 必选，外汇代码，例如：USDCNY（美元人民币）。
-        start_date (str): 可选，起始日期，格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认最早日期。
-        end_date (str): 可选，终止日期，格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”，默认最新日期。
-        limit (int): 可选，输出数量，默认1。
-        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式，默认json。
+
+# 外汇行情接口表：函数名 -> (接口路径, 行情周期, 日期格式)
+# 这些接口的参数完全相同，导入时按模板生成代码，不再逐个手写
+_INTRADAY_DATE_FORMAT = "格式“yyyy-mm-dd”或“yyyy-mm-dd hh:mm:ss”"
+_DAILY_DATE_FORMAT = "格式“yyyy-mm-dd”"
+
+FOREX_REALTIME_ENDPOINTS = {
+    "get_forex_5min_realtime": ("forex/5min/realtime", "日内行情实时5分钟", _INTRADAY_DATE_FORMAT),
+    "get_forex_15min_realtime": ("forex/15min/realtime", "日内行情实时15分钟", _INTRADAY_DATE_FORMAT),
+    "get_forex_30min_realtime": ("forex/30min/realtime", "日内行情实时30分钟", _INTRADAY_DATE_FORMAT),
+    "get_forex_60min_realtime": ("forex/60min/realtime", "日内行情实时60分钟", _INTRADAY_DATE_FORMAT),
+    "get_forex_daily_realtime": ("forex/daily/realtime", "实时日线", _DAILY_DATE_FORMAT),
+    "get_forex_weekly_realtime": ("forex/weekly/realtime", "实时周线", _DAILY_DATE_FORMAT),
+    "get_forex_monthly_realtime": ("forex/monthly/realtime", "实时月线", _DAILY_DATE_FORMAT),
+    "get_forex_yearly_realtime": ("forex/yearly/realtime", "实时年线", _DAILY_DATE_FORMAT),
+}
+
+_FOREX_REALTIME_DOC = """获取外汇{period}数据
+
+    获取指定外汇代码的{period}数据，包括开盘价、最高价、最低价、收盘价等信息。
+
+    参数:
+        ticker (str): 必选，外汇代码。例如：USDCNY（美元人民币）。
+        start_date (str): 可选，起始日期，{date_format}，默认：最早日期。
+        end_date (str): 可选，终止日期，{date_format}，默认：最新日期。
+        limit (int): 可选，输出数量，默认：1。
+        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式，默认：json。
         columns (str): 可选，输出字段，支持自定义输出，多个字段以半角逗号分隔。
-    
-    Returns:
-        dict: 外汇日内行情实时5分钟数据，包含ticker、date、open、high、low、close等字段。
+
+    返回:
+        外汇{period}数据字典
     """
+
+# 生成代码的模板：接口路径和周期名在生成时直接写入函数体，生成的函数与手写函数的字节码相同
+_FOREX_REALTIME_SOURCE = """
+async def {name}(ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
+    params = [("ticker", ticker), ("start_date", start_date), ("end_date", end_date), ("limit", limit), ("fmt", fmt), ("columns", columns)]
     try:
-        endpoint = "forex/5min/realtime"
-        params = {
-            "ticker": ticker,
-            "start_date": start_date,
-            "end_date": end_date,
-            "limit": limit,
-            "fmt": fmt,
-            "columns": columns
-        }
-        
-        # 移除值为None的参数
-        params = {k: v for k, v in params.items() if v is not None}
-        
-        response = await make_fin_request(endpoint, params)
-        if "data" in response:
-            return response["data"]
-        else:
-            logger.error(f"API 响应中缺少有效数据: {response}")
-            return {"error": "API 响应中缺少有效数据", "details": response}
+        response = await make_fin_request({endpoint!r}, params)
+        return _unwrap(response)
+    except Exception as e:
+        logger.error("获取外汇{period}数据错误: %s", e)
+        return error_dict(e)
+"""
+
+def _make_forex_realtime(name: str, endpoint: str, period: str, date_format: str):
+    """根据接口表生成外汇行情查询函数"""
+    exec(_FOREX_REALTIME_SOURCE.format(name=name, endpoint=endpoint, period=period), globals())
+    forex_realtime = globals()[name]
+    forex_realtime.__doc__ = _FOREX_REALTIME_DOC.format(period=period, date_format=date_format)
+    return _check_codes(ticker=_FOREX_TICKERS)(forex_realtime)
+
+for _name, (_endpoint, _period, _date_format) in FOREX_REALTIME_ENDPOINTS.items():
+    globals()[_name] = _make_forex_realtime(_name, _endpoint, _period, _date_format)
+
+# 股票历史数据接口表：函数名 -> (接口路径中交易所代码之后的部分, 数据名称, 日期含义, 返回说明)
+# 这些接口的参数完全相同，与外汇行情接口一样在导入时按模板生成代码
+_REPORT_PERIOD = "（报告期）"
+
+STOCK_HISTORY_ENDPOINTS = {
+    "get_historical_balance_sheet_annual": ("balance/sheet/yearly", "历史资产负债表（年度）", _REPORT_PERIOD, "包含历史资产负债表数据的字典"),
+    "fetch_stock_balance_sheet_quarterly": ("balance/sheet/quarterly", "历史资产负债表（季度）", _REPORT_PERIOD, "包含股票季度资产负债表数据的字典"),
+    "get_historical_eps_quarterly": ("earnings/quarterly", "历史每股收益（季度）", _REPORT_PERIOD, "包含历史每股收益（季度）数据的字典"),
+    "get_historical_eps_annual": ("earnings/yearly", "历史每股收益（年度）", _REPORT_PERIOD,
+                                  "包含历史每股收益数据的字典，字段包括ticker（股票代码）、report_date（报告期）、eps（每股收益）、estimate_eps（预期每股收益）"),
+    "get_historical_income_statement": ("income/statement/quarterly", "历史利润表（季度）", _REPORT_PERIOD, "包含历史利润表数据的字典"),
+    "get_historical_income_statement_annual": ("income/statement/yearly", "历史利润表（年度）", _REPORT_PERIOD, "包含历史利润表数据的字典"),
+    "get_historical_cash_flow_annual": ("cash/flow/yearly", "历史现金流量表（年度）", _REPORT_PERIOD, "包含历史现金流量表数据的字典"),
+    "get_stock_split_history": ("split", "历史送股信息", "", "股票历史送股信息的data数据"),
+    "get_historical_allotment_data": ("allot", "历史配股数据", "", "包含历史配股数据的有效响应数据字典"),
+    "get_historical_dividends": ("dividend", "历史分红数据", "", "历史分红数据字典，包含股票代码、日期、分红等信息"),
+}
+
+_STOCK_HISTORY_DOC = """获取股票{title}
+
+    获取指定股票的{title}，支持按日期筛选和自定义输出。
+
+    参数:
+        exchange_code (str): 必选，交易所代码。例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
+        ticker (str): 必选，股票代码。例如：600519（贵州茅台）、AAPL（苹果）。
+        start_date (str): 可选，起始日期{date_kind}，格式“yyyy-mm-dd”，默认：最早日期。
+        end_date (str): 可选，终止日期{date_kind}，格式“yyyy-mm-dd”，默认：最新日期。
+        limit (int): 可选，输出数量，默认：全部。
+        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式，默认：json。
+        columns (str): 可选，输出字段，支持自定义输出，多个字段以半角逗号分隔。
+        order (int): 可选，按日期排序，0：不排序，1：升序，2：降序，默认：0。
+
+    返回:
+        {returns}
+    """
+
+_STOCK_HISTORY_SOURCE = """
+async def {name}(exchange_code: str, ticker: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None, order: int = None) -> Dict[str, Any]:
+    params = [("ticker", ticker), ("start_date", start_date), ("end_date", end_date), ("limit", limit), ("fmt", fmt), ("columns", columns), ("order", order)]
+    try:
+        response = await make_fin_request(f"stock/{{exchange_code}}/{suffix}", params)
+        return _unwrap(response)
     except Exception as e:
-        logger.error(f"获取外汇日内行情实时5分钟数据时发生错误: {str(e)}")
-        return {"error": f"获取外汇日内行情实时5分钟数据时发生错误: {str(e)}"}
+        logger.error("获取{title}错误: %s", e)
+        return error_dict(e)
+"""
+
+def _make_stock_history(name: str, suffix: str, title: str, date_kind: str, returns: str):
+    """根据接口表生成股票历史数据查询函数"""
+    exec(_STOCK_HISTORY_SOURCE.format(name=name, suffix=suffix, title=title), globals())
+    stock_history = globals()[name]
+    stock_history.__doc__ = _STOCK_HISTORY_DOC.format(title=title, date_kind=date_kind, returns=returns)
+    return _check_codes(exchange_code=_EXCHANGES)(stock_history)
+
+for _name, _spec in STOCK_HISTORY_ENDPOINTS.items():
+    globals()[_name] = _make_stock_history(_name, *_spec)
+
+'''
+##################################################
+#                                                #
+#               批量查询多个代码的函数               #
+#                                                #
+##################################################
+'''
+
+def _split_tickers(tickers: str) -> List[str]:
+    """把半角逗号分隔的代码列表拆分并去重，保持原有顺序"""
+    return list(dict.fromkeys(t.strip() for t in tickers.split(",") if t.strip()))
+
+# 批量查询时同时进行的请求数上限
+BATCH_CONCURRENCY = 64
+
+async def _gather_tools(coros, limit: int = BATCH_CONCURRENCY) -> List[Any]:
+    """并发执行多个工具调用，同时进行的调用数不超过 limit；异常作为结果返回，不影响其他调用"""
+    sem = asyncio.Semaphore(limit)
+    
+    async def run(coro):
+        async with sem:
+            return await coro
+    
+    return await asyncio.gather(*(run(coro) for coro in coros), return_exceptions=True)
+
+async def _fetch_many(keys: List[str], coros) -> Dict[str, Any]:
+    """并发执行多个请求，按代码返回结果；单个请求抛出的异常转换为错误字典，不影响其他请求"""
+    results = await _gather_tools(coros)
+    return {
+        key: error_dict(result) if isinstance(result, BaseException) else result
+        for key, result in zip(keys, results)
+    }
+
+async def get_stock_realtime_daily_data_many(exchange_code: str, tickers: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
+    """批量获取多只股票的实时日线数据（并发请求）
+
+    必选参数:
+        exchange_code (str): 交易所代码，例如：XSHG（上交所）、XSHE（深交所）、XNAS（纳斯达克）。
+        tickers (str): 股票代码，多个代码以半角逗号分隔，例如：600519,601398。
+
+    可选参数:
+        fmt (str): 输出格式，默认为json。支持json和csv两种标准输出格式。
+        columns (str): 自定义输出字段，多个字段以半角逗号分隔。
+
+    返回:
+        以股票代码为键、实时日线数据为值的字典
+    """
+    keys = _split_tickers(tickers)
+    return await _fetch_many(keys, [get_stock_realtime_daily_data(exchange_code, t, fmt, columns) for t in keys])
+
+async def get_index_realtime_daily_data_many(country_code: str, tickers: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
+    """批量获取多个指数的实时日线数据（并发请求）
+
+    参数:
+        country_code (str): 必选，国家/地区代码。例如：CHN（中国）、USA（美国）。
+        tickers (str): 必选，指数代码，多个代码以半角逗号分隔。例如：000001,399001。
+        fmt (str): 可选，默认为"json"，输出格式。支持"json"或"csv"。
+        columns (str): 可选，自定义输出字段，多个字段以逗号分隔。
+
+    返回:
+        以指数代码为键、实时日线数据为值的字典
+    """
+    keys = _split_tickers(tickers)
+    return await _fetch_many(keys, [get_index_realtime_daily_data(country_code, t, fmt, columns) for t in keys])
+
+async def get_forex_realtime_many(tickers: str, fmt: str = "json", columns: Optional[str] = None) -> Dict[str, Any]:
+    """批量获取多个外汇的实时行情数据（并发请求）
+
+    参数:
+        tickers (str): 必选，外汇代码，多个代码以半角逗号分隔。例如：USDCNY,EURCNY。
+        fmt (str): 可选，默认为"json"，输出格式。支持"json"和"csv"两种标准输出格式。
+        columns (Optional[str]): 可选，自定义输出字段，多个字段以半角逗号分隔。
+
+    返回:
+        以外汇代码为键、实时行情数据为值的字典
+    """
+    keys = _split_tickers(tickers)
+    return await _fetch_many(keys, [get_forex_realtime(t, fmt, columns) for t in keys])
+
+async def get_forex_daily_realtime_many(tickers: str, start_date: str = None, end_date: str = None, limit: int = None, fmt: str = None, columns: str = None) -> Dict[str, Any]:
+    """批量获取多个外汇的实时日线数据（并发请求）
+
+    参数:
+        tickers (str): 必选，外汇代码，多个代码以半角逗号分隔。例如：USDCNY,EURCNY。
+        start_date (str): 可选，起始日期，格式“yyyy-mm-dd”。
+        end_date (str): 可选，终止日期，格式“yyyy-mm-dd”。
+        limit (int): 可选，每个代码的输出数量。
+        fmt (str): 可选，输出格式，支持json和csv两种标准输出格式。
+        columns (str): 可选，输出字段，多个字段以半角逗号分隔。
+
+    返回:
+        以外汇代码为键、实时日线数据为值的字典
+    """
+    keys = _split_tickers(tickers)
+    return await _fetch_many(keys, [get_forex_daily_realtime(t, start_date, end_date, limit, fmt, columns) for t in keys])
+
+'''
+##################################################
+#                                                #
+#               服务器生命周期钩子                  #
+#                                                #
+##################################################
+'''
+
+# 启动预热的最长等待时间（秒），沧海 API 不可用时不阻塞服务器启动
+STARTUP_WARMUP_TIMEOUT = 10
+
+# 启动预热任务，保存引用避免任务在完成前被回收
+_warmup_task: Optional[asyncio.Future] = None
+
+async def startup() -> None:
+    """服务器启动时调用：建立共享的 HTTP 客户端，并预先加载国家、交易所、外汇清单到缓存和代码校验集合
+    
+    预热在后台任务中进行，最多等待 STARTUP_WARMUP_TIMEOUT 秒；超时后任务继续运行，完成前代码校验暂不生效
+    """
+    global _warmup_task
+    await _get_client()
+    _warmup_task = asyncio.gather(get_country_info(), get_stock_exchange_info(), get_forex_list())
+    _, pending = await asyncio.wait({_warmup_task}, timeout=STARTUP_WARMUP_TIMEOUT)
+    if pending:
+        logger.warning("启动预热超时，剩余请求将在后台继续完成")
+
+async def shutdown() -> None:
+    """服务器关闭时调用：取消未完成的启动预热，关闭共享的 HTTP 客户端"""
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+    await _close_client()
+
+
+'''
+##################################################
+#                                                #
+#               按名称分发工具调用                  #
+#                                                #
+##################################################
+'''
 
+async def call_tool(name: str, **kwargs) -> Any:
+    """按工具名称调用工具函数，供需要按名称批量调用工具的编排层使用"""
+    func = DISPATCH.get(name)
+    if func is None:
+        return error_dict("UnknownTool", f"未知的工具: {name}")
+    return await func(**kwargs)
+
+# 不属于工具的公开函数：生命周期钩子、通用请求函数、供 server.py 使用的辅助函数和 call_tool 本身
+# DISPATCH 和 server.py 的工具注册共用这一份名单
+NON_TOOL_FUNCTIONS = frozenset({"startup", "shutdown", "make_fin_request", "error_dict", "cache_stats", "call_tool"})
+
+# 工具名称 -> 函数，导入时一次性生成（包括按接口表生成的函数），之后只读
+# 只收录本模块定义的公开协程函数，call_tool 统一 await 调用
+DISPATCH: types.MappingProxyType[str, Callable] = types.MappingProxyType({
+    name: func for name, func in globals().items()
+    if inspect.iscoroutinefunction(func) and func.__module__ == __name__
+    and not name.startswith("_") and name not in NON_TOOL_FUNCTIONS
+})